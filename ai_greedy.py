@@ -1,23 +1,14 @@
 from player import Player
-from evaluate import full_eval
+from evaluate import batch_full_eval, stack_children
 
 class GreedyAI(Player):
     def get_move(self, board):
         legal = board.get_legal_moves(self.color)
         if not legal:
             return None
-        best_score = float('-inf')
-        best_move = None
-        for move in legal:
-            temp_board = copy_board(board)
-            temp_board.do_move(move, self.color)
-            score = full_eval(temp_board, self.color)
-            if score > best_score:
-                best_score = score
-                best_move = move
-        return best_move
+        own, opp = stack_children(board, self.color, legal)
+        scores = batch_full_eval(own, opp)
+        return legal[int(scores.argmax())]
 
 def copy_board(board):
-    import copy
-    new_b = copy.deepcopy(board)
-    return new_b
+    return board.copy()
@@ -1,51 +1,492 @@
+import time
+import cProfile
+import multiprocessing
 from player import Player
-from evaluate import full_eval, base_eval
-import copy
+from board import Board, BLACK
+from evaluate import full_eval, base_eval, SQUARE_WEIGHTS, CORNER_POS, BATCH_EVALS, stack_children
+from transposition import TranspositionTable, EXACT, LOWER, UPPER
+from endgame import EndgameSolver, SolverTimeout
+from book import OpeningBook
+
+INF = float('inf')
+MAX_PLY = 64
+# 限时模式下终局求解最多用掉本步预算的这一部分，求不完再用整步预算（仍从 start 起算）做常规搜索
+# 12 空精确求解通常要 1~2.5 s；迭代加深过了预算一半就不再开新一轮，所以求解只给四分之一
+SOLVER_BUDGET_SHARE = 0.25
+# 每搜索这么多节点检查一次超时与取消
+CHECK_INTERVAL = 256
+
+class SearchTimeout(Exception):
+    pass
+
+# 外部要求中止（stop 被置位）；与超时不同，不返回已有的结果
+class SearchCancelled(Exception):
+    pass
+
+# 进程池中执行：在 (black_bits, white_bits) 局面上由 color 方走 move 后，用全新的搜索器以固定的 alpha 搜索
+# 每个任务独立的置换表保证结果与调度顺序无关
+# deadline 为父进程算好的绝对时刻（time.time()，跨进程可比）；排队等到截止之后才开始的任务直接返回超时
+def _search_root_move(task):
+    black_bits, white_bits, color, move, depth, alpha, deadline, config = task
+    ai = MiniMaxAI(color, depth, **config)
+    board = Board.from_bits(black_bits, white_bits)
+    if deadline is not None:
+        remaining = deadline - time.time()
+        if remaining <= 0:
+            return None, ai.counters()
+        ai.deadline = time.perf_counter() + remaining
+    board.make_move(move, color)
+    try:
+        if ai.pvs:
+            score = -ai.negamax(board, depth - 1, -color, -INF, -alpha)
+        else:
+            score = ai.minimax(board, depth - 1, -color, alpha, INF)
+    except SearchTimeout:
+        score = None
+    return score, ai.counters()
 
 class MiniMaxAI(Player):
-    def __init__(self, color, depth=3, eval_fn=full_eval):
+    # time_limit: 每步秒数；game_time: 整局秒数。任一给定即进入迭代加深模式，此时 depth 为最大深度
+    # pvs=True 使用 negamax + 主变例搜索（零窗口试探、失败高时重搜），False 使用原来的极大极小 alpha-beta
+    # 空格数不超过 endgame_empties 时改由终局求解器精确计算（endgame_mode: "exact" 或 "wld"），0 关闭
+    # workers>1 时根节点并行：先串行搜完排序第一的着法得到 alpha，其余着法以该 alpha 分给进程池
+    # on_progress(stats) 在每个根着法、每轮迭代完成后回调；profile 为文件路径时用 cProfile 包住每次搜索并写入该文件
+    # book 为开局库文件路径（或 OpeningBook），库中有着法时直接走库里的着法，不再搜索
+    # stop 为有 is_set() 的对象（如 multiprocessing.Event），置位后搜索抛出 SearchCancelled
+    def __init__(self, color, depth=3, eval_fn=full_eval, tt_mb=16, time_limit=None, game_time=None, pvs=True,
+                 endgame_empties=12, endgame_mode="exact", workers=1, on_progress=None, profile=None, book=None,
+                 stop=None):
         super().__init__(color)
         self.depth = depth
         self.eval_fn = eval_fn
+        # 评估函数有批量版本时，前沿节点（depth==1）的所有子局面一次评估
+        self.batch_eval = BATCH_EVALS.get(eval_fn)
+        # 置换表在同一局的多次 get_move 之间保留；tt_mb=0 关闭
+        self.tt_mb = tt_mb
+        self.tt = TranspositionTable(tt_mb) if tt_mb else None
+        self.time_limit = time_limit
+        self.game_time = game_time
+        self.pvs = pvs
+        self.endgame_empties = endgame_empties
+        self.solver = EndgameSolver(endgame_mode)
+        self.workers = workers
+        self._pool = None
+        self.on_progress = on_progress
+        self.profile = profile
+        self.book = OpeningBook(book) if isinstance(book, str) else book
+        self.stop = stop
+        self.time_used = 0.0
+        self.deadline = None
+        self.search_start = None
+        self.elapsed = 0.0
+        self.killers = [[None, None] for _ in range(MAX_PLY + 1)]
+        self.history_scores = {BLACK: {}, -BLACK: {}}
+        self.reset_stats()
+
+    def new_game(self):
+        self.time_used = 0.0
+
+    def close(self):
+        if self._pool is not None:
+            self._pool.terminate()
+            self._pool = None
+
+    # 进程池不能随对象一起序列化
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state["_pool"] = None
+        return state
+
+    COUNTERS = ("nodes", "leaves", "eval_calls", "batch_evals", "cutoffs", "first_move_cutoffs",
+                "researches", "tt_hits")
+
+    def reset_stats(self):
+        for name in self.COUNTERS:
+            setattr(self, name, 0)
+        # 批量评估时 nodes 一次加好几个，不能用 nodes 的低位判断检查时机，改为记下一次检查的节点数
+        self.next_check = CHECK_INTERVAL
+        self.completed_depth = 0
+        # 每轮迭代（固定深度时只有一轮）的 (深度, 累计用时, 累计节点数)
+        self.depth_times = []
+        self.used_solver = False
+        self.used_book = False
+        # 最近一次搜索所选着法的分数（行棋方视角；终局求解时为子数差或胜负平）
+        self.last_score = None
+
+    def counters(self):
+        return {name: getattr(self, name) for name in self.COUNTERS}
+
+    def add_counters(self, counters):
+        for name, value in counters.items():
+            setattr(self, name, getattr(self, name) + value)
+
+    # 最近一次（或正在进行的）搜索的统计
+    def stats(self):
+        elapsed = time.perf_counter() - self.search_start if self.search_start is not None else self.elapsed
+        depth = self.completed_depth
+        stats = self.counters()
+        stats.update({
+            "first_move_cutoff_rate": self.first_move_cutoffs / self.cutoffs if self.cutoffs else 0.0,
+            "depth": depth,
+            "time": elapsed,
+            "nps": self.nodes / elapsed if elapsed > 0 else 0.0,
+            # 有效分支因子：节点数开 depth 次方
+            "ebf": self.nodes ** (1 / depth) if depth and self.nodes else 0.0,
+            "depth_times": list(self.depth_times),
+            "solver": self.used_solver,
+            "book": self.used_book,
+            "score": self.last_score,
+        })
+        return stats
+
+    def report_progress(self):
+        if self.on_progress is not None:
+            self.on_progress(self.stats())
+
+    def move_budget(self, board):
+        budget = self.time_limit
+        if self.game_time is not None:
+            b, w = board.count()
+            moves_left = max(1, (64 - b - w + 1) // 2)
+            share = max(0.0, self.game_time - self.time_used) / moves_left
+            budget = share if budget is None else min(budget, share)
+        return budget
 
     def get_move(self, board):
+        return self.search(board)[0]
+
+    # 返回 (着法, 统计)
+    def search(self, board):
+        if self.profile:
+            profiler = cProfile.Profile()
+            profiler.enable()
+            try:
+                move = self._search(board)
+            finally:
+                profiler.disable()
+                profiler.dump_stats(self.profile)
+        else:
+            move = self._search(board)
+        return move, self.stats()
+
+    def _search(self, board):
+        self.reset_stats()
+        start = self.search_start = time.perf_counter()
+        try:
+            return self._search_position(board, start)
+        finally:
+            self.elapsed = time.perf_counter() - start
+            self.search_start = None
+            self.time_used += self.elapsed
+
+    def _search_position(self, board, start):
         legal = board.get_legal_moves(self.color)
         if not legal:
             return None
+        if self.book is not None:
+            move = self.book.choose(board, self.color)
+            if move is not None:
+                self.used_book = True
+                return move
+        if self.tt is not None:
+            self.tt.new_search()
+        self.killers = [[None, None] for _ in range(MAX_PLY + 1)]
+        for table in self.history_scores.values():
+            for m in table:
+                table[m] >>= 1
+        legal = self.order_moves(legal, self.color, 0, self.tt_move(board, self.color))
+        budget = self.move_budget(board)
+        b, w = board.count()
+        if 64 - b - w <= self.endgame_empties:
+            self.solver.stop = self.stop
+            try:
+                best_move, self.last_score = self.solver.solve(
+                    board, self.color, None if budget is None else start + budget * SOLVER_BUDGET_SHARE)
+                self.nodes = self.solver.nodes
+                self.completed_depth = 64 - b - w
+                self.used_solver = True
+                self.depth_times.append((self.completed_depth, time.perf_counter() - start, self.nodes))
+                self.report_progress()
+                return best_move
+            except SolverTimeout:
+                if self.stop is not None and self.stop.is_set():
+                    raise SearchCancelled
+                # 求解超时则退回到常规搜索；iterative_deepening 的截止时间仍是 start + budget，不再重复扣除已用时间
+                self.nodes += self.solver.nodes
+        if budget is None:
+            self.deadline = None
+            best_move, scores = self.search_root(board, legal, self.depth)
+            self.last_score = scores[best_move]
+            self.completed_depth = self.depth
+            self.depth_times.append((self.depth, time.perf_counter() - start, self.nodes))
+            self.report_progress()
+        else:
+            best_move = self.iterative_deepening(board, legal, start, budget)
+        return best_move
+
+    def iterative_deepening(self, board, legal, start, budget):
+        self.deadline = start + budget
+        self.completed_depth = 0
+        best_move = legal[0]
+        state = board.snapshot()
+        for depth in range(1, self.depth + 1):
+            try:
+                best_move, scores = self.search_root(board, legal, depth)
+            except SearchTimeout:
+                board.restore(state)
+                break
+            self.last_score = scores[best_move]
+            self.completed_depth = depth
+            self.depth_times.append((depth, time.perf_counter() - start, self.nodes))
+            self.report_progress()
+            # 上一轮的分数决定下一轮根节点的搜索顺序
+            legal = sorted(legal, key=lambda m: -scores[m])
+            # 剩余时间不够再完成一轮时不再开始新一轮
+            if time.perf_counter() - start > budget / 2:
+                break
+        self.deadline = None
+        return best_move
+
+    def search_root(self, board, legal, depth):
+        if self.workers > 1 and len(legal) > 1 and depth > 1:
+            return self.parallel_search_root(board, legal, depth)
         best_move = legal[0]
-        best_score = float('-inf')
-        for move in legal:
-            temp_board = copy.deepcopy(board)
-            temp_board.do_move(move, self.color)
-            score = self.minimax(temp_board, self.depth - 1, -self.color, float('-inf'), float('inf'))
+        best_score = -INF
+        scores = {}
+        for i, move in enumerate(legal):
+            flipped = board.make_move(move, self.color)
+            if not self.pvs:
+                score = self.minimax(board, depth - 1, -self.color, best_score, INF)
+            elif i == 0:
+                score = -self.negamax(board, depth - 1, -self.color, -INF, INF)
+            else:
+                score = -self.negamax(board, depth - 1, -self.color, -best_score - 1, -best_score)
+                if score > best_score:
+                    self.researches += 1
+                    score = -self.negamax(board, depth - 1, -self.color, -INF, -best_score)
+            board.undo_move(move, self.color, flipped)
+            scores[move] = score
             if score > best_score:
                 best_score = score
                 best_move = move
-        return best_move
+            self.report_progress()
+        return best_move, scores
+
+    def parallel_search_root(self, board, legal, depth):
+        first = legal[0]
+        flipped = board.make_move(first, self.color)
+        if self.pvs:
+            best_score = -self.negamax(board, depth - 1, -self.color, -INF, INF)
+        else:
+            best_score = self.minimax(board, depth - 1, -self.color, -INF, INF)
+        board.undo_move(first, self.color, flipped)
+        if self._pool is None:
+            self._pool = multiprocessing.Pool(self.workers)
+        config = {"eval_fn": self.eval_fn, "tt_mb": self.tt_mb, "pvs": self.pvs, "endgame_empties": 0}
+        deadline = None if self.deadline is None else time.time() + (self.deadline - time.perf_counter())
+        tasks = [(board.black_bits, board.white_bits, self.color, move, depth, best_score, deadline, config)
+                 for move in legal[1:]]
+        # 按顺序取结果，遇到第一个超时就放弃这一轮（其余任务到截止时刻即返回，不会拖住进程池）
+        results = self._pool.imap(_search_root_move, tasks, chunksize=1)
+        best_move = first
+        scores = {first: best_score}
+        for move, (score, counters) in zip(legal[1:], results):
+            self.add_counters(counters)
+            if score is None:
+                raise SearchTimeout
+            scores[move] = score
+            # 不超过 alpha 的只是上界，不会取代第一个着法；超过的是精确值，同分取排序靠前者
+            if score > best_score:
+                best_score = score
+                best_move = move
+        return best_move, scores
+
+    def tt_move(self, board, color):
+        if self.tt is None:
+            return None
+        entry = self.tt.probe(board.key(color))
+        return entry[3] if entry is not None else None
+
+    # 走法排序：置换表着法 > 角 > 杀手着法 > 历史分 + 静态位置权重
+    def order_moves(self, legal, color, ply, tt_move):
+        killers = self.killers[ply]
+        history = self.history_scores[color]
+        def priority(m):
+            if m == tt_move:
+                return 1 << 40
+            if m in CORNER_POS:
+                return (1 << 30) + SQUARE_WEIGHTS[m[0]][m[1]]
+            if m == killers[0] or m == killers[1]:
+                return 1 << 20
+            return history.get(m, 0) + SQUARE_WEIGHTS[m[0]][m[1]]
+        return sorted(legal, key=priority, reverse=True)
+
+    def record_cutoff(self, move, color, depth, ply, index):
+        self.cutoffs += 1
+        if index == 0:
+            self.first_move_cutoffs += 1
+        killers = self.killers[ply]
+        if move != killers[0]:
+            killers[1] = killers[0]
+            killers[0] = move
+        history = self.history_scores[color]
+        history[move] = history.get(move, 0) + depth * depth
+
+    # 返回 (分值, 最佳着法)，分值站在 perspective 一方，color 为行棋方
+    def eval_children(self, board, color, legal, perspective):
+        self.nodes += len(legal)
+        self.leaves += len(legal)
+        self.eval_calls += len(legal)
+        self.batch_evals += 1
+        own, opp = stack_children(board, color, legal)
+        if color == perspective:
+            scores = self.batch_eval(own, opp)
+            i = int(scores.argmax())
+        else:
+            scores = self.batch_eval(opp, own)
+            i = int(scores.argmin())
+        return scores[i].item(), legal[i]
+
+    def check_time(self):
+        if self.nodes >= self.next_check:
+            self.next_check = self.nodes + CHECK_INTERVAL
+            if self.stop is not None and self.stop.is_set():
+                raise SearchCancelled
+            if self.deadline is not None and time.perf_counter() > self.deadline:
+                raise SearchTimeout
 
-    def minimax(self, board, depth, color, alpha, beta):
-        if depth == 0 or board.is_game_over():
+    def probe_tt(self, key, depth, alpha, beta):
+        entry = self.tt.probe(key)
+        if entry is None:
+            return None, alpha, beta, None
+        self.tt_hits += 1
+        e_depth, bound, e_value, tt_move = entry
+        if e_depth >= depth:
+            if bound == EXACT:
+                return e_value, alpha, beta, tt_move
+            if bound == LOWER:
+                alpha = max(alpha, e_value)
+            else:
+                beta = min(beta, e_value)
+            if alpha >= beta:
+                return e_value, alpha, beta, tt_move
+        return None, alpha, beta, tt_move
+
+    def store_tt(self, key, depth, value, alpha0, beta0, best_move):
+        if value <= alpha0:
+            bound = UPPER
+        elif value >= beta0:
+            bound = LOWER
+        else:
+            bound = EXACT
+        self.tt.store(key, depth, bound, value, best_move)
+
+    # negamax 形式的 PVS，分值总是站在 color 一方
+    def negamax(self, board, depth, color, alpha, beta, ply=1):
+        self.nodes += 1
+        self.check_time()
+        if depth == 0:
+            self.leaves += 1
+            self.eval_calls += 1
+            return self.eval_fn(board, color)
+        tt_move = None
+        if self.tt is not None:
+            key = board.key(color)
+            value, alpha, beta, tt_move = self.probe_tt(key, depth, alpha, beta)
+            if value is not None:
+                return value
+        alpha0, beta0 = alpha, beta
+        legal = board.get_legal_moves(color)
+        if not legal:
+            if not board.get_legal_moves(-color):  # 双方都无子可下，终局
+                self.leaves += 1
+                self.eval_calls += 1
+                return self.eval_fn(board, color)
+            return -self.negamax(board, depth-1, -color, -beta, -alpha, ply+1)
+        if depth == 1 and self.batch_eval is not None:
+            value, best_move = self.eval_children(board, color, legal, color)
+            if self.tt is not None:
+                self.tt.store(key, depth, EXACT, value, best_move)
+            return value
+        legal = self.order_moves(legal, color, ply, tt_move)
+        best_move = legal[0]
+        value = -INF
+        for i, move in enumerate(legal):
+            flipped = board.make_move(move, color)
+            if i == 0:
+                score = -self.negamax(board, depth-1, -color, -beta, -alpha, ply+1)
+            else:
+                score = -self.negamax(board, depth-1, -color, -alpha-1, -alpha, ply+1)
+                if alpha < score < beta:
+                    self.researches += 1
+                    score = -self.negamax(board, depth-1, -color, -beta, -score, ply+1)
+            board.undo_move(move, color, flipped)
+            if score > value:
+                value = score
+                best_move = move
+            if value > alpha:
+                alpha = value
+            if alpha >= beta:
+                self.record_cutoff(move, color, depth, ply, i)
+                break
+        if self.tt is not None:
+            self.store_tt(key, depth, value, alpha0, beta0, best_move)
+        return value
+
+    def minimax(self, board, depth, color, alpha, beta, ply=1):
+        self.nodes += 1
+        self.check_time()
+        if depth == 0:
+            self.leaves += 1
+            self.eval_calls += 1
             return self.eval_fn(board, self.color)
+        tt_move = None
+        if self.tt is not None:
+            key = board.key(color)
+            value, alpha, beta, tt_move = self.probe_tt(key, depth, alpha, beta)
+            if value is not None:
+                return value
+        alpha0, beta0 = alpha, beta
         legal = board.get_legal_moves(color)
         if not legal:
-            return self.minimax(board, depth-1, -color, alpha, beta)
+            if not board.get_legal_moves(-color):  # 双方都无子可下，终局
+                self.leaves += 1
+                self.eval_calls += 1
+                return self.eval_fn(board, self.color)
+            return self.minimax(board, depth-1, -color, alpha, beta, ply+1)
+        if depth == 1 and self.batch_eval is not None:
+            value, best_move = self.eval_children(board, color, legal, self.color)
+            if self.tt is not None:
+                self.tt.store(key, depth, EXACT, value, best_move)
+            return value
+        legal = self.order_moves(legal, color, ply, tt_move)
+        best_move = legal[0]
         if color == self.color:  # max层
-            value = float('-inf')
-            for move in legal:
-                temp_board = copy.deepcopy(board)
-                temp_board.do_move(move, color)
-                value = max(value, self.minimax(temp_board, depth-1, -color, alpha, beta))
+            value = -INF
+            for i, move in enumerate(legal):
+                flipped = board.make_move(move, color)
+                score = self.minimax(board, depth-1, -color, alpha, beta, ply+1)
+                board.undo_move(move, color, flipped)
+                if score > value:
+                    value = score
+                    best_move = move
                 alpha = max(alpha, value)
                 if alpha >= beta:
+                    self.record_cutoff(move, color, depth, ply, i)
                     break
-            return value
         else:  # min层
-            value = float('inf')
-            for move in legal:
-                temp_board = copy.deepcopy(board)
-                temp_board.do_move(move, color)
-                value = min(value, self.minimax(temp_board, depth-1, -color, alpha, beta))
+            value = INF
+            for i, move in enumerate(legal):
+                flipped = board.make_move(move, color)
+                score = self.minimax(board, depth-1, -color, alpha, beta, ply+1)
+                board.undo_move(move, color, flipped)
+                if score < value:
+                    value = score
+                    best_move = move
                 beta = min(beta, value)
                 if alpha >= beta:
+                    self.record_cutoff(move, color, depth, ply, i)
                     break
-            return value
\ No newline at end of file
+        if self.tt is not None:
+            self.store_tt(key, depth, value, alpha0, beta0, best_move)
+        return value
@@ -0,0 +1,146 @@
+import os, sys, json, time, argparse, platform, datetime
+from evaluate import full_eval
+from ai_minimax import MiniMaxAI
+from endgame import EndgameSolver
+from perft import perft, load_position
+
+# 固定的基准局面：从初始局面开始的着法序列（None 表示跳过）
+BENCH_POSITIONS = {
+    "opening": [],
+    "midgame": [(4, 5), (3, 5), (2, 5), (5, 5), (2, 3), (1, 5), (5, 6), (2, 2), (2, 1), (1, 1),
+                (3, 6), (2, 6), (0, 1), (1, 3), (3, 2), (4, 2), (0, 5), (1, 6), (0, 6), (4, 6)],
+    "endgame": [(5, 4), (5, 5), (4, 5), (5, 3), (4, 2), (3, 1), (2, 2), (3, 5), (6, 5), (7, 5),
+                (7, 6), (1, 3), (5, 1), (6, 3), (7, 4), (2, 3), (5, 2), (6, 1), (2, 4), (7, 2),
+                (7, 1), (7, 0), (3, 2), (2, 5), (1, 6), (1, 5), (0, 5), (0, 7), (1, 1), (4, 6),
+                (1, 4), (6, 4), (4, 7), (0, 3), (7, 3), (5, 0), (1, 7), (2, 7), (3, 6), (1, 2),
+                (2, 1), (2, 0), (6, 0), (1, 0)],
+}
+# 每个局面的 perft 深度与搜索最大深度
+PERFT_DEPTH = {"opening": 7, "midgame": 5, "endgame": 6}
+SEARCH_DEPTH = {"opening": 8, "midgame": 7, "endgame": 8}
+EVAL_CALLS = 20000
+BASELINE_PATH = "benchmarks/baseline.json"
+# 速率下降超过该比例视为性能回退
+REGRESSION_TOLERANCE = 0.10
+
+def bench_perft(board, color, depth):
+    start = time.perf_counter()
+    nodes = perft(board, color, depth)
+    elapsed = time.perf_counter() - start
+    return {"depth": depth, "nodes": nodes, "time": elapsed, "nps": nodes / elapsed}
+
+# Board 缓存了合法着法掩码，对同一局面反复评估只有第一次会生成着法；
+# 因此轮流在各个子局面上评估（落子、评估、悔棋，每次都清掉缓存），计入的时间与搜索中叶节点的开销相当
+def bench_eval(board, color, calls=EVAL_CALLS):
+    legal = board.get_legal_moves(color)
+    start = time.perf_counter()
+    for i in range(calls):
+        move = legal[i % len(legal)]
+        flipped = board.make_move(move, color)
+        full_eval(board, -color)
+        board.undo_move(move, color, flipped)
+    elapsed = time.perf_counter() - start
+    return {"calls": calls, "time": elapsed, "calls_per_sec": calls / elapsed}
+
+# 每个深度用全新的 AI（置换表为空），记录到达该深度的时间与节点数
+def bench_search(board, color, max_depth):
+    result = {}
+    for depth in range(1, max_depth + 1):
+        ai = MiniMaxAI(color, depth, endgame_empties=0)
+        start = time.perf_counter()
+        move = ai.get_move(board)
+        elapsed = time.perf_counter() - start
+        stats = ai.stats()
+        result[str(depth)] = {"time": elapsed, "nodes": stats["nodes"], "cutoffs": stats["cutoffs"],
+                              "nps": stats["nodes"] / elapsed if elapsed else 0.0,
+                              "move": list(move) if move else None}
+    return result
+
+def bench_solver(board, color, mode="wld"):
+    solver = EndgameSolver(mode)
+    start = time.perf_counter()
+    move, score = solver.solve(board, color)
+    elapsed = time.perf_counter() - start
+    return {"mode": mode, "time": elapsed, "nodes": solver.nodes, "score": score,
+            "move": list(move) if move else None}
+
+def run_benchmarks(names=None, verbose=True):
+    results = {
+        "meta": {"date": datetime.datetime.now().isoformat(timespec="seconds"),
+                 "python": sys.version.split()[0], "platform": platform.platform()},
+        "perft": {}, "eval": {}, "search": {}, "solver": {},
+    }
+    for name in names or BENCH_POSITIONS:
+        board, color = load_position(BENCH_POSITIONS[name])
+        results["perft"][name] = bench_perft(board, color, PERFT_DEPTH[name])
+        results["eval"][name] = bench_eval(board, color)
+        results["search"][name] = bench_search(board, color, SEARCH_DEPTH[name])
+        if name == "endgame":
+            results["solver"][name] = bench_solver(board, color)
+        if verbose:
+            p, e = results["perft"][name], results["eval"][name]
+            last = results["search"][name][str(SEARCH_DEPTH[name])]
+            print(f"{name:>8}: perft({p['depth']})={p['nodes']} {p['nps']:,.0f} nodes/s | "
+                  f"full_eval {e['calls_per_sec']:,.0f}/s | "
+                  f"depth {SEARCH_DEPTH[name]} in {last['time']:.2f}s ({last['nodes']} nodes)")
+    return results
+
+# 与基线比较：perft 节点数必须一致（走法生成正确性），各项速率下降超过容差即报告回退
+def compare(results, baseline, tolerance=REGRESSION_TOLERANCE):
+    problems = []
+    for name, p in results["perft"].items():
+        b = baseline.get("perft", {}).get(name)
+        if not b:
+            continue
+        if b["depth"] == p["depth"] and b["nodes"] != p["nodes"]:
+            problems.append(f"perft {name}: 节点数 {p['nodes']} != 基线 {b['nodes']}")
+        if p["nps"] < b["nps"] * (1 - tolerance):
+            problems.append(f"perft {name}: {p['nps']:,.0f} nodes/s，基线 {b['nps']:,.0f}")
+    for name, e in results["eval"].items():
+        b = baseline.get("eval", {}).get(name)
+        if b and e["calls_per_sec"] < b["calls_per_sec"] * (1 - tolerance):
+            problems.append(f"eval {name}: {e['calls_per_sec']:,.0f}/s，基线 {b['calls_per_sec']:,.0f}/s")
+    for name, depths in results["search"].items():
+        for depth, s in depths.items():
+            b = baseline.get("search", {}).get(name, {}).get(depth)
+            if b and s["time"] > b["time"] * (1 + tolerance) and s["time"] > 0.2:
+                problems.append(f"search {name} depth {depth}: {s['time']:.2f}s，基线 {b['time']:.2f}s")
+    for name, s in results["solver"].items():
+        b = baseline.get("solver", {}).get(name)
+        if b and b["mode"] == s["mode"] and b["score"] != s["score"]:
+            problems.append(f"solver {name}: 结果 {s['score']} != 基线 {b['score']}")
+    return problems
+
+def save(results, path):
+    folder = os.path.dirname(path)
+    if folder and not os.path.exists(folder):
+        os.makedirs(folder)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(results, f, indent=1)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="走法生成 / 评估 / 搜索基准测试")
+    parser.add_argument("positions", nargs="*", help="要测的局面：" + ", ".join(BENCH_POSITIONS) + "（默认全部）")
+    parser.add_argument("--out", default=f"benchmarks/bench_{datetime.datetime.now().strftime('%Y%m%d-%H%M%S')}.json")
+    parser.add_argument("--baseline", default=BASELINE_PATH)
+    parser.add_argument("--save-baseline", action="store_true", help="把本次结果存为新的基线")
+    args = parser.parse_args()
+    unknown = [p for p in args.positions if p not in BENCH_POSITIONS]
+    if unknown:
+        parser.error(f"未知局面: {', '.join(unknown)}")
+    results = run_benchmarks(args.positions or None)
+    save(results, args.out)
+    print(f"结果已保存到 {args.out}")
+    if args.save_baseline:
+        save(results, args.baseline)
+        print(f"已更新基线 {args.baseline}")
+    elif os.path.exists(args.baseline):
+        with open(args.baseline, encoding="utf-8") as f:
+            problems = compare(results, json.load(f))
+        for p in problems:
+            print("回退:", p)
+        if not problems:
+            print("与基线相比无回退")
+        sys.exit(1 if problems else 0)
+    else:
+        print(f"未找到基线 {args.baseline}，可用 --save-baseline 生成")
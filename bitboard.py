@@ -0,0 +1,115 @@
+# 位棋盘：第 x 行第 y 列对应第 x*8+y 位，一方棋子用一个64位整数表示
+FULL = 0xFFFFFFFFFFFFFFFF
+COL_0 = 0x0101010101010101
+COL_7 = 0x8080808080808080
+NOT_COL_0 = FULL ^ COL_0
+NOT_COL_7 = FULL ^ COL_7
+
+# (位移量, 位移后屏蔽跨行的掩码)
+LEFT_SHIFTS = [(1, NOT_COL_0), (7, NOT_COL_7), (8, FULL), (9, NOT_COL_0)]
+RIGHT_SHIFTS = [(1, NOT_COL_7), (7, NOT_COL_0), (8, FULL), (9, NOT_COL_7)]
+
+try:
+    popcount = int.bit_count
+except AttributeError:  # Python < 3.10
+    def popcount(x):
+        return bin(x).count("1")
+
+
+def square(x, y):
+    return x * 8 + y
+
+
+def to_xy(sq):
+    return divmod(sq, 8)
+
+
+def iter_squares(bits):
+    while bits:
+        low = bits & -bits
+        yield low.bit_length() - 1
+        bits ^= low
+
+
+def legal_moves(own, opp):
+    empty = FULL ^ (own | opp)
+    moves = 0
+    for s, m in LEFT_SHIFTS:
+        mo = opp & m
+        t = (own << s) & mo
+        t |= (t << s) & mo
+        t |= (t << s) & mo
+        t |= (t << s) & mo
+        t |= (t << s) & mo
+        t |= (t << s) & mo
+        moves |= (t << s) & m & empty
+    for s, m in RIGHT_SHIFTS:
+        mo = opp & m
+        t = (own >> s) & mo
+        t |= (t >> s) & mo
+        t |= (t >> s) & mo
+        t |= (t >> s) & mo
+        t |= (t >> s) & mo
+        t |= (t >> s) & mo
+        moves |= (t >> s) & m & empty
+    return moves
+
+
+def flips(own, opp, sq):
+    bit = 1 << sq
+    result = 0
+    for s, m in LEFT_SHIFTS:
+        t = 0
+        x = (bit << s) & m
+        while x & opp:
+            t |= x
+            x = (x << s) & m
+        if x & own:
+            result |= t
+    for s, m in RIGHT_SHIFTS:
+        t = 0
+        x = (bit >> s) & m
+        while x & opp:
+            t |= x
+            x = (x >> s) & m
+        if x & own:
+            result |= t
+    return result
+
+
+# ---- 棋盘的 8 种对称变换 ----
+def flip_vertical(bits):  # 第 x 行 -> 第 7-x 行
+    return int.from_bytes(bits.to_bytes(8, "little"), "big")
+
+
+def mirror_horizontal(bits):  # 第 y 列 -> 第 7-y 列
+    bits = ((bits >> 1) & 0x5555555555555555) | ((bits & 0x5555555555555555) << 1)
+    bits = ((bits >> 2) & 0x3333333333333333) | ((bits & 0x3333333333333333) << 2)
+    return ((bits >> 4) & 0x0F0F0F0F0F0F0F0F) | ((bits & 0x0F0F0F0F0F0F0F0F) << 4)
+
+
+def transpose(bits):  # (x, y) -> (y, x)
+    t = 0x0F0F0F0F00000000 & (bits ^ (bits << 28))
+    bits ^= t ^ (t >> 28)
+    t = 0x3333000033330000 & (bits ^ (bits << 14))
+    bits ^= t ^ (t >> 14)
+    t = 0x5500550055005500 & (bits ^ (bits << 7))
+    bits ^= t ^ (t >> 7)
+    return bits
+
+
+# sym 取 0..7：依次按位决定是否转置(4)、左右镜像(2)、上下翻转(1)；0 为恒等
+def transform(bits, sym):
+    if sym & 4:
+        bits = transpose(bits)
+    if sym & 2:
+        bits = mirror_horizontal(bits)
+    if sym & 1:
+        bits = flip_vertical(bits)
+    return bits
+
+
+# SYM_SQUARES[sym][sq]：格子 sq 在变换 sym 下的位置；INVERSE_SYM[sym] 为逆变换
+SYM_SQUARES = [[transform(1 << sq, sym).bit_length() - 1 for sq in range(64)] for sym in range(8)]
+INVERSE_SYM = [next(inv for inv in range(8) if all(SYM_SQUARES[inv][SYM_SQUARES[sym][sq]] == sq for sq in range(64)))
+               for sym in range(8)]
@@ -1,66 +1,190 @@
 import numpy as np
+from bitboard import legal_moves, flips, popcount, iter_squares
+from zobrist import ZOBRIST_BLACK, ZOBRIST_WHITE, ZOBRIST_FLIP, ZOBRIST_SIDE, hash_bits
 
 EMPTY, BLACK, WHITE = 0, 1, -1
 
 DIRECTIONS = [(-1,-1), (-1,0), (-1,1), (0,-1), (0,1), (1,-1), (1,0), (1,1)]
 
+# 经典的静态位置权重：角最好，X位/C位最差
+SQUARE_WEIGHTS = [
+    [100, -20, 10,  5,  5, 10, -20, 100],
+    [-20, -50, -2, -2, -2, -2, -50, -20],
+    [ 10,  -2, -1, -1, -1, -1,  -2,  10],
+    [  5,  -2, -1, -1, -1, -1,  -2,   5],
+    [  5,  -2, -1, -1, -1, -1,  -2,   5],
+    [ 10,  -2, -1, -1, -1, -1,  -2,  10],
+    [-20, -50, -2, -2, -2, -2, -50, -20],
+    [100, -20, 10,  5,  5, 10, -20, 100],
+]
+_WEIGHTS = [w for row in SQUARE_WEIGHTS for w in row]
+CORNER_MASK = 0x8100000000000081
+
 class Board:
     def __init__(self):
         self.size = 8
-        self.board = np.zeros((self.size, self.size), dtype=int)
+        self.black_bits = 0
+        self.white_bits = 0
+        self.hash = 0
+        # 增量维护的评估信息：子数、角数、位置权重分（黑减白）
+        self.black_count = 0
+        self.white_count = 0
+        self.black_corners = 0
+        self.white_corners = 0
+        self.positional = 0
+        self._array = None
+        # 双方合法着法掩码的缓存，按需计算，局面一变即作废
+        self._legal_black = self._legal_white = None
         self._init_board()
 
+    @classmethod
+    def from_bits(cls, black_bits, white_bits):
+        board = cls.__new__(cls)
+        board.size = 8
+        board.black_bits = black_bits
+        board.white_bits = white_bits
+        board._recompute()
+        return board
+
     def _init_board(self):
         mid = self.size // 2
-        self.board[mid-1][mid-1] = WHITE
-        self.board[mid][mid] = WHITE
-        self.board[mid-1][mid] = BLACK
-        self.board[mid][mid-1] = BLACK
+        self.black_bits = (1 << ((mid-1)*8 + mid)) | (1 << (mid*8 + mid-1))
+        self.white_bits = (1 << ((mid-1)*8 + mid-1)) | (1 << (mid*8 + mid))
+        self._recompute()
+
+    # 整盘重算哈希与评估信息（只在初始化、整盘赋值时调用）
+    def _recompute(self):
+        self.hash = hash_bits(self.black_bits, self.white_bits)
+        self.black_count = popcount(self.black_bits)
+        self.white_count = popcount(self.white_bits)
+        self.black_corners = popcount(self.black_bits & CORNER_MASK)
+        self.white_corners = popcount(self.white_bits & CORNER_MASK)
+        self.positional = sum(_WEIGHTS[sq] for sq in iter_squares(self.black_bits)) - \
+            sum(_WEIGHTS[sq] for sq in iter_squares(self.white_bits))
+        self._array = None
+        self._legal_black = self._legal_white = None
+
+    # 兼容旧接口：board.board 仍是 8x8 数组（只读视图，按需从位棋盘生成）
+    @property
+    def board(self):
+        if self._array is None:
+            black = np.unpackbits(np.frombuffer(self.black_bits.to_bytes(8, "little"), dtype=np.uint8),
+                                  bitorder="little")
+            white = np.unpackbits(np.frombuffer(self.white_bits.to_bytes(8, "little"), dtype=np.uint8),
+                                  bitorder="little")
+            arr = (black.astype(int) - white.astype(int)).reshape(self.size, self.size)
+            arr.flags.writeable = False
+            self._array = arr
+        return self._array
+
+    @board.setter
+    def board(self, arr):
+        flat = np.asarray(arr).reshape(-1)
+        self.black_bits = int.from_bytes(np.packbits(flat == BLACK, bitorder="little").tobytes(), "little")
+        self.white_bits = int.from_bytes(np.packbits(flat == WHITE, bitorder="little").tobytes(), "little")
+        self._recompute()
+
+    def bits(self, color):
+        if color == BLACK:
+            return self.black_bits, self.white_bits
+        return self.white_bits, self.black_bits
 
     def in_board(self, x, y):
         return 0 <= x < self.size and 0 <= y < self.size
 
+    def legal_mask(self, color):
+        if color == BLACK:
+            mask = self._legal_black
+            if mask is None:
+                mask = self._legal_black = legal_moves(self.black_bits, self.white_bits)
+        else:
+            mask = self._legal_white
+            if mask is None:
+                mask = self._legal_white = legal_moves(self.white_bits, self.black_bits)
+        return mask
+
+    def is_legal(self, move, color):
+        x, y = move
+        return self.in_board(x, y) and (self.legal_mask(color) >> (x * 8 + y)) & 1 == 1
+
+    # 置换表键：局面哈希再区分轮到哪一方
+    def key(self, color):
+        return self.hash ^ ZOBRIST_SIDE if color == WHITE else self.hash
+
     def get_legal_moves(self, color):
-        legal = set()
-        for i in range(self.size):
-            for j in range(self.size):
-                if self.board[i][j] != EMPTY:
-                    continue
-                for dx, dy in DIRECTIONS:
-                    x, y = i+dx, j+dy
-                    found_opponent = False
-                    while self.in_board(x, y) and self.board[x][y] == -color:
-                        found_opponent = True
-                        x, y = x+dx, y+dy
-                    if found_opponent and self.in_board(x, y) and self.board[x][y] == color:
-                        legal.add((i, j))
-                        break
-        return list(legal)
+        return [divmod(sq, 8) for sq in iter_squares(self.legal_mask(color))]
 
     def do_move(self, move, color):
-        if move is None or move not in self.get_legal_moves(color):
+        if move is None or not self.is_legal(move, color):
             return False
-        x0, y0 = move
-        self.board[x0][y0] = color
-        for dx, dy in DIRECTIONS:
-            x, y = x0+dx, y0+dy
-            to_flip = []
-            while self.in_board(x, y) and self.board[x][y] == -color:
-                to_flip.append((x, y))
-                x += dx
-                y += dy
-            if to_flip and self.in_board(x, y) and self.board[x][y] == color:
-                for fx, fy in to_flip:
-                    self.board[fx][fy] = color
+        self.make_move(move, color)
         return True
 
+    # 搜索等可信调用方用的落子/撤销：不做合法性检查，返回被翻转的棋子掩码供 undo_move 还原
+    def make_move(self, move, color):
+        sq = move[0] * 8 + move[1]
+        own, opp = self.bits(color)
+        flipped = flips(own, opp, sq)
+        self._apply(sq, color, flipped, 1)
+        return flipped
+
+    def undo_move(self, move, color, flipped):
+        self._apply(move[0] * 8 + move[1], color, flipped, -1)
+
+    # sign=1 落子，sign=-1 撤销；棋子异或、哈希与评估信息的增量更新对两者对称
+    def _apply(self, sq, color, flipped, sign):
+        placed = 1 << sq
+        n = popcount(flipped)
+        h = self.hash
+        gain = _WEIGHTS[sq]
+        for f in iter_squares(flipped):
+            h ^= ZOBRIST_FLIP[f]
+            gain += 2 * _WEIGHTS[f]
+        corner = 1 if placed & CORNER_MASK else 0
+        if color == BLACK:
+            self.black_bits ^= flipped | placed
+            self.white_bits ^= flipped
+            h ^= ZOBRIST_BLACK[sq]
+            self.black_count += sign * (n + 1)
+            self.white_count -= sign * n
+            self.black_corners += sign * corner
+            self.positional += sign * gain
+        else:
+            self.white_bits ^= flipped | placed
+            self.black_bits ^= flipped
+            h ^= ZOBRIST_WHITE[sq]
+            self.white_count += sign * (n + 1)
+            self.black_count -= sign * n
+            self.white_corners += sign * corner
+            self.positional -= sign * gain
+        self.hash = h
+        self._array = None
+        self._legal_black = self._legal_white = None
+
+    # 搜索中途中止时用来整体还原局面
+    def snapshot(self):
+        return (self.black_bits, self.white_bits, self.hash, self.black_count, self.white_count,
+                self.black_corners, self.white_corners, self.positional)
+
+    def restore(self, state):
+        (self.black_bits, self.white_bits, self.hash, self.black_count, self.white_count,
+         self.black_corners, self.white_corners, self.positional) = state
+        self._array = None
+        self._legal_black = self._legal_white = None
+
+    def copy(self):
+        new = Board.__new__(Board)
+        new.size = self.size
+        new.restore(self.snapshot())
+        new._array = self._array
+        new._legal_black, new._legal_white = self._legal_black, self._legal_white
+        return new
+
     def is_game_over(self):
-        return not self.get_legal_moves(BLACK) and not self.get_legal_moves(WHITE)
+        return not self.legal_mask(BLACK) and not self.legal_mask(WHITE)
 
     def count(self):
-        black = np.sum(self.board == BLACK)
-        white = np.sum(self.board == WHITE)
-        return black, white
+        return self.black_count, self.white_count
 
     def print_board(self):
         print("  " + " ".join(str(y) for y in range(self.size)))
@@ -74,4 +198,4 @@ class Board:
                     line.append('○')
                 else:
                     line.append('.')
-            print(f"{x} {' '.join(line)}")
\ No newline at end of file
+            print(f"{x} {' '.join(line)}")
@@ -0,0 +1,196 @@
+import os, sys, glob, json, struct, random, argparse, multiprocessing
+import numpy as np
+from board import Board, BLACK
+from bitboard import transform, SYM_SQUARES, INVERSE_SYM
+from zobrist import hash_bits
+from replay import GameRecord, read_games, REPLAY_EXT
+
+# 开局库：局面按 8 种对称归一后以 Zobrist 哈希为键，记录每个着法的对局数与得分（胜 1、平 0.5，行棋方视角）
+# 文件格式：头部 + 开放寻址哈希槽（线性探测，键 0 为空槽）+ 着法表；用 np.memmap 按需读取，打开时不加载内容
+BOOK_PATH = "book/book.bin"
+MAGIC = b"OBK1"
+HEADER = struct.Struct("<4sII")  # 魔数、槽数（2 的幂）、着法数
+SLOT_DTYPE = np.dtype([("key", "<u8"), ("first", "<u4"), ("count", "<u4")])
+MOVE_DTYPE = np.dtype([("square", "u1"), ("games", "<u4"), ("points", "<f4")])
+BOOK_PLIES = 20
+MIN_GAMES = 3
+
+# 返回 (键, 变换列表)：变换后 (己方, 对方) 最小的即规范形式；对称局面会有多个变换得到同一规范形式
+def canonical(own, opp):
+    best, syms = None, []
+    for sym in range(8):
+        pair = (transform(own, sym), transform(opp, sym))
+        if best is None or pair < best:
+            best, syms = pair, [sym]
+        elif pair == best:
+            syms.append(sym)
+    return hash_bits(*best) or 1, syms
+
+def canonical_square(sq, syms):
+    return min(SYM_SQUARES[sym][sq] for sym in syms)
+
+class BookBuilder:
+    def __init__(self, plies=BOOK_PLIES):
+        self.plies = plies
+        self.positions = {}  # 键 -> {规范格子: [对局数, 得分]}
+        self.games = 0
+
+    # result 为黑方视角的结果；只记录前 plies 步，开头 skip 步（如随机开局）照走但不记录
+    def add_game(self, moves, result=None, skip=0):
+        if result is None:
+            result = GameRecord(moves).result()
+        board, color = Board(), BLACK
+        for ply, move in enumerate(moves):
+            if ply >= self.plies:
+                break
+            if move is not None:
+                if ply >= skip:
+                    own, opp = board.bits(color)
+                    key, syms = canonical(own, opp)
+                    stats = self.positions.setdefault(key, {}).setdefault(
+                        canonical_square(move[0] * 8 + move[1], syms), [0, 0.0])
+                    stats[0] += 1
+                    stats[1] += (1 + result * color) / 2
+                if not board.do_move(tuple(move), color):
+                    raise ValueError(f"第 {ply + 1} 步非法: {move}")
+            color = -color
+        self.games += 1
+
+    # 原 JSON 复盘与二进制棋谱都可以
+    def add_replays(self, patterns=("replays/*.json", "replays/*" + REPLAY_EXT)):
+        for pattern in patterns:
+            for path in sorted(glob.glob(pattern)):
+                for game in read_games(path):
+                    self.add_game(game.moves, game.header.get("result"), game.header.get("opening_plies", 0))
+
+    # tournament.py 输出的 JSONL（每行一盘，含 moves 与 result）；开头 opening_plies 步是随机开局，不计入开局库
+    # （较早的结果文件没有该字段，只能全部计入）
+    def add_results(self, pattern="results/*.jsonl"):
+        for path in sorted(glob.glob(pattern)):
+            with open(path, encoding="utf-8") as f:
+                for line in f:
+                    r = json.loads(line)
+                    self.add_game(r["moves"], r["result"], r.get("opening_plies", 0))
+
+    # 去掉对局数不足 min_games 的着法后写入 path
+    def save(self, path=BOOK_PATH, min_games=1):
+        entries = []
+        for key, moves in self.positions.items():
+            kept = [(sq, g, p) for sq, (g, p) in moves.items() if g >= min_games]
+            if kept:
+                entries.append((key, kept))
+        n_slots = 16
+        while n_slots < 2 * len(entries):
+            n_slots *= 2
+        slots = np.zeros(n_slots, dtype=SLOT_DTYPE)
+        move_table = np.zeros(sum(len(kept) for _, kept in entries), dtype=MOVE_DTYPE)
+        first = 0
+        for key, kept in entries:
+            i = key & (n_slots - 1)
+            while slots[i]["key"]:
+                i = (i + 1) & (n_slots - 1)
+            slots[i] = (key, first, len(kept))
+            for sq, g, p in kept:
+                move_table[first] = (sq, g, p)
+                first += 1
+        folder = os.path.dirname(path)
+        if folder and not os.path.exists(folder):
+            os.makedirs(folder)
+        with open(path, "wb") as f:
+            f.write(HEADER.pack(MAGIC, n_slots, len(move_table)))
+            f.write(slots.tobytes())
+            f.write(move_table.tobytes())
+        return len(entries), len(move_table)
+
+class OpeningBook:
+    def __init__(self, path=BOOK_PATH, min_games=MIN_GAMES):
+        self.path = path
+        self.min_games = min_games
+        self._slots = None
+        self._moves = None
+
+    # 第一次查询时才映射文件；文件不存在则视为空库
+    def _open(self):
+        if self._slots is not None:
+            return self._slots.size > 0
+        if not os.path.exists(self.path):
+            self._slots = np.zeros(0, dtype=SLOT_DTYPE)
+            return False
+        with open(self.path, "rb") as f:
+            magic, n_slots, n_moves = HEADER.unpack(f.read(HEADER.size))
+        if magic != MAGIC:
+            raise ValueError(f"{self.path} 不是开局库文件")
+        self._slots = np.memmap(self.path, dtype=SLOT_DTYPE, mode="r", offset=HEADER.size, shape=(n_slots,))
+        self._moves = np.memmap(self.path, dtype=MOVE_DTYPE, mode="r",
+                                offset=HEADER.size + n_slots * SLOT_DTYPE.itemsize, shape=(n_moves,))
+        return n_slots > 0
+
+    # memmap 不随对象序列化（进程池中的玩家重新映射）
+    def __getstate__(self):
+        return {"path": self.path, "min_games": self.min_games, "_slots": None, "_moves": None}
+
+    # 返回 [(着法, 对局数, 平均得分)]，着法已变换回当前局面的方向
+    def probe(self, board, color):
+        if not self._open():
+            return []
+        own, opp = board.bits(color)
+        key, syms = canonical(own, opp)
+        mask = self._slots.size - 1
+        i = key & mask
+        while True:
+            slot = self._slots[i]
+            if slot["key"] == key:
+                break
+            if not slot["key"]:
+                return []
+            i = (i + 1) & mask
+        inverse = INVERSE_SYM[syms[0]]
+        result = []
+        for m in self._moves[slot["first"]:slot["first"] + slot["count"]]:
+            games = int(m["games"])
+            result.append((divmod(SYM_SQUARES[inverse][int(m["square"])], 8), games, float(m["points"]) / games))
+        return result
+
+    # 对局数足够的着法中平均得分最高的；randomness>0 时在与最高分相差不超过它的着法中随机选
+    def choose(self, board, color, randomness=0.0, rng=random):
+        moves = [m for m in self.probe(board, color) if m[1] >= self.min_games]
+        if not moves:
+            return None
+        best = max(score for _, _, score in moves)
+        candidates = [move for move, _, score in moves if score >= best - randomness]
+        return candidates[0] if len(candidates) == 1 else rng.choice(candidates)
+
+# 同一配置自己对弈，黑白互换是同一盘棋，每个开局只下一盘
+def self_play_games(name, n_openings, plies=4, seed=0, workers=None):
+    from tournament import PLAYER_CONFIGS, random_openings, play_game
+    conf = PLAYER_CONFIGS[name]
+    tasks = [(name, name, conf, conf, idx, opening)
+             for idx, opening in enumerate(random_openings(n_openings, plies, seed))]
+    with multiprocessing.Pool(workers or os.cpu_count()) as pool:
+        yield from pool.imap_unordered(play_game, tasks)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="从复盘文件、对战结果与自对弈生成开局库")
+    parser.add_argument("--out", default=BOOK_PATH)
+    parser.add_argument("--plies", type=int, default=BOOK_PLIES, help="每盘收录的步数")
+    parser.add_argument("--replays", nargs="*", default=["replays/*.json", "replays/*" + REPLAY_EXT],
+                        help="复盘文件（.json 或二进制棋谱）")
+    parser.add_argument("--results", default="results/*.jsonl", help="tournament.py 的结果文件")
+    parser.add_argument("--selfplay", type=int, default=0, help="自对弈的随机开局数（每个开局一盘）")
+    parser.add_argument("--player", default="MiniMax-6+", help="自对弈使用的参赛者配置")
+    parser.add_argument("--random-plies", type=int, default=4, help="自对弈随机开局的步数")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--min-games", type=int, default=1, help="写入文件的着法至少要有的对局数")
+    args = parser.parse_args()
+    builder = BookBuilder(args.plies)
+    builder.add_replays(args.replays)
+    builder.add_results(args.results)
+    if args.selfplay:
+        for i, r in enumerate(self_play_games(args.player, args.selfplay, args.random_plies, args.seed,
+                                              args.workers), 1):
+            builder.add_game(r["moves"], r["result"], r["opening_plies"])
+            print(f"\r自对弈 {i}/{args.selfplay}", end="", file=sys.stderr)
+        print(file=sys.stderr)
+    n_positions, n_moves = builder.save(args.out, args.min_games)
+    print(f"{builder.games} 盘，{n_positions} 个局面，{n_moves} 个着法，已保存到 {args.out}")
@@ -0,0 +1,71 @@
+import math
+from statistics import NormalDist
+
+# 对局结果按 (胜, 平, 负) 计数，均站在同一方（通常是被测试的新版本）的角度
+
+def score_rate(wins, draws, losses):
+    n = wins + draws + losses
+    return (wins + 0.5 * draws) / n if n else 0.5
+
+def elo_from_score(p):
+    p = min(max(p, 1e-6), 1 - 1e-6)
+    return -400 * math.log10(1 / p - 1)
+
+def score_from_elo(elo):
+    return 1 / (1 + 10 ** (-elo / 400))
+
+# 单盘得分的方差（三项分布）
+def score_variance(wins, draws, losses):
+    n = wins + draws + losses
+    if not n:
+        return 0.0
+    p = score_rate(wins, draws, losses)
+    return (wins * (1 - p) ** 2 + draws * (0.5 - p) ** 2 + losses * p ** 2) / n
+
+# 返回 (Elo 差, 下界, 上界)
+def elo_interval(wins, draws, losses, confidence=0.95):
+    n = wins + draws + losses
+    p = score_rate(wins, draws, losses)
+    if not n:
+        return 0.0, -math.inf, math.inf
+    se = math.sqrt(score_variance(wins, draws, losses) / n)
+    z = NormalDist().inv_cdf(0.5 + confidence / 2)
+    return elo_from_score(p), elo_from_score(p - z * se), elo_from_score(p + z * se)
+
+# likelihood of superiority：更强的概率（平局不计）
+def los(wins, losses):
+    if wins + losses == 0:
+        return 0.5
+    return 0.5 * (1 + math.erf((wins - losses) / math.sqrt(2 * (wins + losses))))
+
+class SPRT:
+    # H0: Elo 差 = elo0，H1: Elo 差 = elo1；alpha/beta 为两类错误率
+    def __init__(self, elo0=0.0, elo1=10.0, alpha=0.05, beta=0.05):
+        self.elo0, self.elo1 = elo0, elo1
+        self.lower = math.log(beta / (1 - alpha))
+        self.upper = math.log((1 - beta) / alpha)
+
+    # 广义 SPRT 的正态近似对数似然比
+    # 方差按各加半盘胜、负的伪计数估计：全胜/全负/全平时样本方差为 0，不加的话永远停不下来
+    def llr(self, wins, draws, losses):
+        n = wins + draws + losses
+        if not n:
+            return 0.0
+        var = score_variance(wins + 0.5, draws, losses + 0.5)
+        s0, s1 = score_from_elo(self.elo0), score_from_elo(self.elo1)
+        s = score_rate(wins, draws, losses)
+        return 0.5 * n * (s1 - s0) * (2 * s - s0 - s1) / var
+
+    # "H1"（接受更强）、"H0"（接受不强）或 None（继续下）
+    def status(self, wins, draws, losses):
+        llr = self.llr(wins, draws, losses)
+        if llr >= self.upper:
+            return "H1"
+        if llr <= self.lower:
+            return "H0"
+        return None
+
+def report(wins, draws, losses, confidence=0.95):
+    elo, lo, hi = elo_interval(wins, draws, losses, confidence)
+    return (f"胜{wins} 平{draws} 负{losses}  得分率{score_rate(wins, draws, losses):.3f}  "
+            f"Elo {elo:+.1f} [{lo:+.1f}, {hi:+.1f}]  LOS {los(wins, losses):.1%}")
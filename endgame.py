@@ -0,0 +1,82 @@
+import time
+from bitboard import legal_moves, flips, popcount, iter_squares
+
+# 四个象限，用于奇偶性排序：优先在空格数为奇数的区域落子
+QUADRANTS = [0x000000000F0F0F0F, 0x00000000F0F0F0F0, 0x0F0F0F0F00000000, 0xF0F0F0F000000000]
+# 空格多于此数时按“对手行动力最少优先”（fastest-first）排序，否则只按奇偶性排序
+FASTEST_FIRST_EMPTIES = 6
+
+
+class SolverTimeout(Exception):
+    pass
+
+
+class EndgameSolver:
+    # mode="exact" 求精确子数差；mode="wld" 只判断胜/负/平（窗口 -1..1，快得多）
+    def __init__(self, mode="exact"):
+        self.mode = mode
+        self.nodes = 0
+        self.deadline = None
+        self.stop = None  # 有 is_set() 的对象（如 multiprocessing.Event），置位后同超时一样中止
+
+    # 返回 (best_move, score)，score 为 color 方最终子数差（wld 模式下为 1/0/-1）
+    def solve(self, board, color, deadline=None):
+        self.nodes = 0
+        self.deadline = deadline
+        own, opp = board.bits(color)
+        moves = legal_moves(own, opp)
+        if not moves:
+            return None, -self.negamax(opp, own, -64, 64, True)
+        alpha, beta = (-1, 1) if self.mode == "wld" else (-64, 64)
+        best_sq, best = None, -65
+        for sq in self.order(own, opp, moves):
+            f = flips(own, opp, sq)
+            score = -self.negamax(opp ^ f, own | f | (1 << sq), -beta, -alpha, False)
+            if score > best:
+                best_sq, best = sq, score
+            if best > alpha:
+                alpha = best
+            if alpha >= beta:
+                break
+        if self.mode == "wld":
+            best = (best > 0) - (best < 0)
+        return divmod(best_sq, 8), best
+
+    def order(self, own, opp, moves):
+        empty = ~(own | opp) & 0xFFFFFFFFFFFFFFFF
+        odd = 0
+        for q in QUADRANTS:
+            if popcount(empty & q) & 1:
+                odd |= q
+        if popcount(empty) <= FASTEST_FIRST_EMPTIES:
+            return list(iter_squares(moves & odd)) + list(iter_squares(moves & ~odd))
+        scored = []
+        for sq in iter_squares(moves):
+            f = flips(own, opp, sq)
+            mobility = popcount(legal_moves(opp ^ f, own | f | (1 << sq)))
+            scored.append((mobility - ((odd >> sq) & 1), sq))
+        scored.sort()
+        return [sq for _, sq in scored]
+
+    def negamax(self, own, opp, alpha, beta, passed):
+        self.nodes += 1
+        if not self.nodes & 1023 and (self.deadline is not None and time.perf_counter() > self.deadline or
+                                      self.stop is not None and self.stop.is_set()):
+            raise SolverTimeout
+        moves = legal_moves(own, opp)
+        if not moves:
+            if passed:  # 双方都无子可下，终局
+                return popcount(own) - popcount(opp)
+            return -self.negamax(opp, own, -beta, -alpha, True)
+        best = -65
+        for sq in self.order(own, opp, moves):
+            f = flips(own, opp, sq)
+            score = -self.negamax(opp ^ f, own | f | (1 << sq), -beta, -alpha, False)
+            if score > best:
+                best = score
+                if score > alpha:
+                    alpha = score
+                    if alpha >= beta:
+                        break
+        return best
+
@@ -1,5 +1,6 @@
 import numpy as np
-from board import BLACK, WHITE
+from board import BLACK, WHITE, SQUARE_WEIGHTS
+from bitboard import flips, popcount
 
 corner_weight = 25
 action_weight = 8
@@ -7,25 +8,100 @@ piece_weight = 1
 
 CORNER_POS = [(0,0),(0,7),(7,0),(7,7)]
 
+# 子数、角、位置分都由 Board 在落子/撤销时增量维护，这里 O(1) 读取；color 为 ±1，乘上即换到 color 一方视角
 def base_eval(board: 'Board', color):
-    opp = -color
-    my_count = np.sum(board.board == color)
-    opp_count = np.sum(board.board == opp)
-    return piece_weight * (my_count - opp_count)
+    return piece_weight * (board.black_count - board.white_count) * color
 
 def mobility_eval(board: 'Board', color):
     opp = -color
-    my_move = len(board.get_legal_moves(color))
-    opp_move = len(board.get_legal_moves(opp))
+    my_move = popcount(board.legal_mask(color))
+    opp_move = popcount(board.legal_mask(opp))
     return action_weight * (my_move - opp_move)
 
 def corner_eval(board: 'Board', color):
-    opp = -color
-    my_corner = sum(board.board[x][y]==color for x,y in CORNER_POS)
-    opp_corner = sum(board.board[x][y]==opp for x,y in CORNER_POS)
-    return corner_weight * (my_corner - opp_corner)
+    return corner_weight * (board.black_corners - board.white_corners) * color
+
+def positional_eval(board: 'Board', color):
+    return board.positional * color
 
 def full_eval(board: 'Board', color):
     return (base_eval(board, color) +
             mobility_eval(board, color) +
-            corner_eval(board, color))
\ No newline at end of file
+            corner_eval(board, color))
+
+# ---- 批量评估：一次对一组局面打分 ----
+# own/opp 为 np.uint64 数组，第 i 个元素是第 i 个局面中“被评估方”和对方的位棋盘
+_U64 = np.uint64
+_FULL = _U64(0xFFFFFFFFFFFFFFFF)
+_NOT_COL_0 = _U64(0xFEFEFEFEFEFEFEFE)
+_NOT_COL_7 = _U64(0x7F7F7F7F7F7F7F7F)
+# 四个位移方向一次广播计算：左移/右移各自对应的跨行屏蔽掩码
+_SHIFTS = np.array([1, 7, 8, 9], dtype=np.uint64)[:, None]
+_LEFT_MASKS = np.array([_NOT_COL_0, _NOT_COL_7, _FULL, _NOT_COL_0], dtype=np.uint64)[:, None]
+_RIGHT_MASKS = np.array([_NOT_COL_7, _NOT_COL_0, _FULL, _NOT_COL_7], dtype=np.uint64)[:, None]
+_CORNER_MASK = _U64(0x8100000000000081)
+_SQUARE_WEIGHTS_FLAT = np.array(SQUARE_WEIGHTS, dtype=np.int64).reshape(64)
+_POPCOUNT8 = np.array([bin(i).count("1") for i in range(256)], dtype=np.int64)
+
+def stack_positions(boards, color):
+    own = np.fromiter((b.bits(color)[0] for b in boards), dtype=np.uint64, count=len(boards))
+    opp = np.fromiter((b.bits(color)[1] for b in boards), dtype=np.uint64, count=len(boards))
+    return own, opp
+
+# color 方在 board 上分别走 moves 中每一步后的子局面（仍站在 color 一方）
+def stack_children(board, color, moves):
+    own, opp = board.bits(color)
+    child_own = np.empty(len(moves), dtype=np.uint64)
+    child_opp = np.empty(len(moves), dtype=np.uint64)
+    for i, (x, y) in enumerate(moves):
+        sq = x * 8 + y
+        f = flips(own, opp, sq)
+        child_own[i] = own | f | (1 << sq)
+        child_opp[i] = opp ^ f
+    return child_own, child_opp
+
+def batch_popcount(a):
+    if hasattr(np, "bitwise_count"):
+        return np.bitwise_count(a).astype(np.int64)
+    return _POPCOUNT8[a.view(np.uint8).reshape(-1, 8)].sum(axis=1)
+
+def batch_legal_moves(own, opp):
+    mo = opp & _LEFT_MASKS
+    t = (own << _SHIFTS) & mo
+    for _ in range(5):
+        t |= (t << _SHIFTS) & mo
+    moves = np.bitwise_or.reduce((t << _SHIFTS) & _LEFT_MASKS, axis=0)
+    mo = opp & _RIGHT_MASKS
+    t = (own >> _SHIFTS) & mo
+    for _ in range(5):
+        t |= (t >> _SHIFTS) & mo
+    moves |= np.bitwise_or.reduce((t >> _SHIFTS) & _RIGHT_MASKS, axis=0)
+    return moves & ~(own | opp)
+
+def batch_base_eval(own, opp):
+    return piece_weight * (batch_popcount(own) - batch_popcount(opp))
+
+def batch_mobility_eval(own, opp):
+    # 双方行动力拼在一起算一次
+    both = batch_popcount(batch_legal_moves(np.concatenate([own, opp]), np.concatenate([opp, own])))
+    n = len(own)
+    return action_weight * (both[:n] - both[n:])
+
+def batch_corner_eval(own, opp):
+    return corner_weight * (batch_popcount(own & _CORNER_MASK) - batch_popcount(opp & _CORNER_MASK))
+
+def batch_positional_eval(own, opp):
+    own_cells = np.unpackbits(own.astype("<u8").view(np.uint8).reshape(-1, 8), axis=1, bitorder="little")
+    opp_cells = np.unpackbits(opp.astype("<u8").view(np.uint8).reshape(-1, 8), axis=1, bitorder="little")
+    return (own_cells.astype(np.int64) - opp_cells) @ _SQUARE_WEIGHTS_FLAT
+
+def batch_full_eval(own, opp):
+    return (batch_base_eval(own, opp) +
+            batch_mobility_eval(own, opp) +
+            batch_corner_eval(own, opp))
+
+# 单局面评估函数 -> 对应的批量版本，搜索据此决定能否批量评估
+BATCH_EVALS = {
+    base_eval: batch_base_eval,
+    full_eval: batch_full_eval,
+}
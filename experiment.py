@@ -1,27 +1,31 @@
-import time
-from main import game_loop
 from ai_greedy import GreedyAI
 from ai_minimax import MiniMaxAI
+from tournament import run_tournament, random_openings, head_to_head
+from elo import report
 
-def battle(ai1_class, ai2_class, n_games=10, depth1=3, depth2=3, verbose=True):
+# time1/time2 为每步限时（秒），给定时 depth1/depth2 作为迭代加深的最大深度
+# 对局交由 tournament 多进程执行：双方轮换执黑，因此 n_games 向上取偶数；第一组用标准开局，其余为随机开局
+# sprt 为 elo.SPRT 时把 n_games 当作上限，检验有结论即停止
+def battle(ai1_class, ai2_class, n_games=10, depth1=3, depth2=3, verbose=True, time1=None, time2=None,
+           workers=None, out_path=None, sprt=None):
+    configs = {"ai1": {"ai_class": ai1_class}, "ai2": {"ai_class": ai2_class}}
+    if ai1_class == MiniMaxAI:
+        configs["ai1"].update(depth=depth1, time_limit=time1)
+    if ai2_class == MiniMaxAI:
+        configs["ai2"].update(depth=depth2, time_limit=time2)
+    n_openings = max(1, (n_games + 1) // 2)
+    openings = [[]] + random_openings(n_openings - 1)
+    results = run_tournament([("ai1", "ai2")], configs, openings, workers=workers, out_path=out_path, verbose=verbose,
+                             sprt=sprt)
     result = {"ai1":0, "ai2":0, "draw":0}
-    total_time = []
-    for i in range(n_games):
-        start = time.time()
-        if verbose:
-            print(f"\nGame {i+1} ...")
-        winner = game_loop(ai1_class, ai2_class, depth1, depth2)
-        end = time.time()
-        total_time.append(end-start)
-        if winner == 1:
-            result["ai1"] += 1
-        elif winner == -1:
-            result["ai2"] += 1
-        else:
-            result["draw"] += 1
+    for r in results:
+        winner = r["black"] if r["result"] == 1 else r["white"] if r["result"] == -1 else None
+        result[winner or "draw"] += 1
     print(result)
-    print(f"Avg time/game: {sum(total_time)/n_games:.2f}s")
+    print(f"Avg time/game: {sum(r['game_time'] for r in results)/len(results):.2f}s")
+    print("ai1: " + report(*head_to_head(results, "ai1")))
+    return results
 
 if __name__ == "__main__":
     # 示例：MiniMaxAI(3) vs GreedyAI
-    battle(MiniMaxAI, GreedyAI, n_games=5, depth1=3, depth2=0)
\ No newline at end of file
+    battle(MiniMaxAI, GreedyAI, n_games=6, depth1=3, depth2=0)
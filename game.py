@@ -0,0 +1,111 @@
+import time
+from board import Board, BLACK, WHITE
+
+# 观察者：按需重写其中的方法，Game 在对应事件发生时调用
+class GameObserver:
+    def on_move(self, game, color, move):
+        pass
+
+    def on_pass(self, game, color):
+        pass
+
+    def on_undo(self, game, color, move):
+        pass
+
+    def on_game_over(self, game):
+        pass
+
+# 打印终局棋盘与结果（原 main.game_loop 的输出）
+class ConsoleObserver(GameObserver):
+    def on_game_over(self, game):
+        b, w = game.board.count()
+        game.board.print_board()
+        print("Game Over.\nBlack: %d  White: %d" % (b, w))
+        print({1: "Black wins!", -1: "White wins!", 0: "Draw."}[game.result()])
+
+# 无界面的对局引擎：轮次与跳过、着法记录、悔棋、思考计时；命令行、图形界面与对战赛共用
+# moves 中 None 表示跳过；color 为当前行棋方（first 指定先手，默认黑先）
+class Game:
+    def __init__(self, black, white, first=BLACK, observers=()):
+        self.players = {BLACK: black, WHITE: white}
+        self.board = Board()
+        self.color = first
+        self.first = first
+        self.moves = []
+        self._flips = []  # 与 moves 对应的翻转掩码，悔棋用
+        self.observers = list(observers)
+        self.think_time = {BLACK: 0.0, WHITE: 0.0}
+        self.move_count = {BLACK: 0, WHITE: 0}
+
+    @property
+    def current_player(self):
+        return self.players[self.color]
+
+    def legal_moves(self):
+        return self.board.get_legal_moves(self.color)
+
+    # 合法着法与终局判断都由 Board 缓存，同一局面反复调用不会重复扫描
+    def is_over(self):
+        return self.board.is_game_over()
+
+    # 黑方视角 1/0/-1
+    def result(self):
+        b, w = self.board.count()
+        return (b > w) - (w > b)
+
+    # 落子（会检查合法性），之后若对方无子可下则自动记一次跳过
+    def play(self, move):
+        move = tuple(move)
+        if not self.board.is_legal(move, self.color):
+            raise ValueError(f"非法着法 {move}")
+        color = self.color
+        self._flips.append(self.board.make_move(move, color))
+        self.moves.append(move)
+        self.color = -color
+        for o in self.observers:
+            o.on_move(self, color, move)
+        self._skip_pass()
+
+    def _skip_pass(self):
+        if self.is_over():
+            for o in self.observers:
+                o.on_game_over(self)
+        elif not self.board.legal_mask(self.color):
+            self.moves.append(None)
+            self._flips.append(0)
+            for o in self.observers:
+                o.on_pass(self, self.color)
+            self.color = -self.color
+
+    # 让当前行棋方的玩家走一步，返回着法
+    def step(self):
+        player = self.current_player
+        color = self.color
+        start = time.perf_counter()
+        move = player.get_move(self.board)
+        self.think_time[color] += time.perf_counter() - start
+        self.move_count[color] += 1
+        self.play(move)
+        return move
+
+    # 一直下到终局，返回结果
+    def run(self):
+        self._skip_pass()  # 开局时先手就无子可下的局面
+        while not self.is_over():
+            self.step()
+        return self.result()
+
+    # 撤销最近一步落子（连同其后的跳过），返回被撤销的着法；没有可撤销的返回 None
+    def undo(self):
+        while self.moves and self.moves[-1] is None:
+            self.moves.pop()
+            self._flips.pop()
+            self.color = -self.color
+        if not self.moves:
+            return None
+        move = self.moves.pop()
+        self.color = -self.color
+        self.board.undo_move(move, self.color, self._flips.pop())
+        for o in self.observers:
+            o.on_undo(self, self.color, move)
+        return move
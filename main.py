@@ -1,33 +1,19 @@
-from board import Board, BLACK, WHITE
+from board import BLACK, WHITE
 from player import HumanPlayer
 from ai_greedy import GreedyAI
 from ai_minimax import MiniMaxAI
+from game import Game, ConsoleObserver
 
-def game_loop(player1_class, player2_class, depth1=3, depth2=3):
-    board = Board()
-    player1 = player1_class(BLACK) if player1_class != MiniMaxAI else MiniMaxAI(BLACK, depth1)
-    player2 = player2_class(WHITE) if player2_class != MiniMaxAI else MiniMaxAI(WHITE, depth2)
-    turn = 0
-    cur_player = player1
-    while not board.is_game_over():
-        cur_player = player1 if turn % 2 == 0 else player2
-        color = cur_player.color
-        move = cur_player.get_move(board)
-        if move is not None:
-            board.do_move(move, color)
-        turn += 1
-    b, w = board.count()
-    board.print_board()
-    print("Game Over.\nBlack: %d  White: %d" % (b, w))
-    if b > w:
-        print("Black wins!")
-        return 1
-    elif w > b:
-        print("White wins!")
-        return -1
-    else:
-        print("Draw.")
-        return 0
+# depth/time 只传给 MiniMaxAI；verbose=False 时不打印任何内容（批量对局用）
+def make_player(player_class, color, depth=3, time_limit=None):
+    if player_class == MiniMaxAI:
+        return MiniMaxAI(color, depth, time_limit=time_limit)
+    return player_class(color)
+
+def game_loop(player1_class, player2_class, depth1=3, depth2=3, time1=None, time2=None, verbose=True):
+    game = Game(make_player(player1_class, BLACK, depth1, time1), make_player(player2_class, WHITE, depth2, time2),
+                observers=[ConsoleObserver()] if verbose else [])
+    return game.run()
 
 if __name__ == '__main__':
     from ui import print_welcome
@@ -0,0 +1,208 @@
+import os, sys, time, argparse
+import numpy as np
+from board import SQUARE_WEIGHTS
+from bitboard import transpose
+from evaluate import BATCH_EVALS, batch_popcount
+
+# 模式（n 元组）评估：把边、角、对角线、2x5 角块等模式的格子状态编成三进制下标（空 0、己方 1、对方 2），
+# 查表求和。每个模式的所有对称实例共用一张表；按子数分 N_STAGES 个阶段各用一套表
+# 下标直接由位棋盘算出：行取字节后查 B3 表（字节 -> 三进制值），列先转置成行，对角线用乘法把各格收集到最高字节；
+# 单个局面求值时再把这些按行预先加好（ROW_TABLES），只需 8 次查表和几次大整数加法
+
+# (名称, 格子数, 基准实例的格子——按读取顺序，第 j 格对应三进制第 j 位)
+PATTERNS = [
+    ("edge2x", 10, [0, 1, 2, 3, 4, 5, 6, 7, 9, 14]),
+    ("corner2x5", 10, [0, 1, 2, 3, 4, 8, 9, 10, 11, 12]),
+    ("corner3x3", 9, [0, 1, 2, 8, 9, 10, 16, 17, 18]),
+    ("line2", 8, list(range(8, 16))),
+    ("line3", 8, list(range(16, 24))),
+    ("line4", 8, list(range(24, 32))),
+    ("diag8", 8, [i * 9 for i in range(8)]),
+    ("diag7", 7, [i * 9 + 1 for i in range(7)]),
+    ("diag6", 6, [i * 9 + 2 for i in range(6)]),
+    ("diag5", 5, [i * 9 + 3 for i in range(5)]),
+    ("diag4", 4, [i * 9 + 4 for i in range(4)]),
+]
+# pattern_indices 产生实例的顺序：每个实例属于哪个模式
+INSTANCE_PATTERNS = ([0] * 4 + [1] * 8 + [2] * 4 + [3] * 4 + [4] * 4 + [5] * 4 +
+                     [6] * 2 + [7] * 4 + [8] * 4 + [9] * 4 + [10] * 4)
+OFFSETS = np.cumsum([0] + [3 ** n for _, n, _ in PATTERNS])
+TABLE_SIZE = int(OFFSETS[-1])  # 一个阶段所有表的总长度
+INSTANCE_OFFSETS = np.array([OFFSETS[p] for p in INSTANCE_PATTERNS], dtype=np.int64)
+N_STAGES = 4
+# 各阶段每个实例在权重数组中的起点
+_STAGE_OFFSETS = [(INSTANCE_OFFSETS + s * TABLE_SIZE).tolist() for s in range(N_STAGES)]
+WEIGHTS_PATH = "patterns/weights.npy"
+
+# 行字节 -> 三进制值：T[己方字节][对方字节]，第 y 列为第 y 位；TR 为倒序（第 y 列为第 7-y 位）
+_B3 = [sum(3 ** i for i in range(8) if b >> i & 1) for b in range(256)]
+_BR = [sum(3 ** (7 - i) for i in range(8) if b >> i & 1) for b in range(256)]
+T = [[_B3[a] + 2 * _B3[b] for b in range(256)] for a in range(256)]
+TR = [[_BR[a] + 2 * _BR[b] for b in range(256)] for a in range(256)]
+
+MAGIC = 0x0101010101010101
+# 对角线实例：(掩码, 右移位数, 留下的位)；乘 MAGIC 把对角线上各行的子收集到最高字节，按列号从小到大读取
+# 沿 (i, i+d)、(i+d, i) 两个方向及其上下翻转
+DIAGONALS = []
+for _, n, _ in PATTERNS[6:]:
+    d = 8 - n
+    masks = [sum(1 << (i * 8 + i + d) for i in range(n)), sum(1 << ((7 - i) * 8 + i + d) for i in range(n))]
+    DIAGONALS += [(m, 56 + d, (1 << n) - 1) for m in masks]
+    if d:
+        masks = [sum(1 << ((i + d) * 8 + i) for i in range(n)), sum(1 << ((7 - i - d) * 8 + i) for i in range(n))]
+        DIAGONALS += [(m, 56, (1 << n) - 1) for m in masks]
+
+# 所有实例的三进制下标（顺序同 INSTANCE_PATTERNS）；行、列直接取字节，对角线用乘法
+# 这是下标的定义，由它生成 POWERS 与按行的表（pattern_eval 用后者，不调用它）
+def pattern_indices(own, opp):
+    idx = []
+    r_o, r_p = own.to_bytes(8, "little"), opp.to_bytes(8, "little")
+    c_o, c_p = transpose(own).to_bytes(8, "little"), transpose(opp).to_bytes(8, "little")
+    lines = []
+    for ro, rp in ((r_o, r_p), (c_o, c_p)):  # 列转置成行后与行同样处理
+        o0, p0, o1, p1, o6, p6, o7, p7 = ro[0], rp[0], ro[1], rp[1], ro[6], rp[6], ro[7], rp[7]
+        # edge2x：整条边加上相邻行第 1、6 列的 X 位
+        idx.append(T[o0][p0] + 2187 * T[o1 & 2][p1 & 2] + 27 * T[o1 & 64][p1 & 64])
+        idx.append(T[o7][p7] + 2187 * T[o6 & 2][p6 & 2] + 27 * T[o6 & 64][p6 & 64])
+        lines.append((ro, rp))
+    # 2x5 角块：每条边两头各一个，行、列两个方向
+    for ro, rp in lines:
+        for a, b in ((0, 1), (7, 6)):
+            oa, pa, ob, pb = ro[a], rp[a], ro[b], rp[b]
+            idx.append(T[oa & 31][pa & 31] + 243 * T[ob & 31][pb & 31])
+            idx.append(TR[oa & 248][pa & 248] + 243 * TR[ob & 248][pb & 248])
+    # 3x3 角块转置后不变，只在行方向取 4 个角
+    for a, b, c in ((0, 1, 2), (7, 6, 5)):
+        oa, pa, ob, pb, oc, pc = r_o[a], r_p[a], r_o[b], r_p[b], r_o[c], r_p[c]
+        idx.append(T[oa & 7][pa & 7] + 27 * T[ob & 7][pb & 7] + 729 * T[oc & 7][pc & 7])
+        idx.append(TR[oa & 224][pa & 224] + 27 * TR[ob & 224][pb & 224] + 729 * TR[oc & 224][pc & 224])
+    for x, y in ((1, 6), (2, 5), (3, 4)):
+        for ro, rp in lines:
+            idx.append(T[ro[x]][rp[x]])
+            idx.append(T[ro[y]][rp[y]])
+    for mask, shift, keep in DIAGONALS:
+        idx.append(T[(own & mask) * MAGIC >> shift & keep][(opp & mask) * MAGIC >> shift & keep])
+    return idx
+
+# 每格对每个实例下标的贡献（己方子为 1 倍，对方子为 2 倍）：批量计算时三进制下标 = 格子状态 @ POWERS
+POWERS = np.array([pattern_indices(1 << sq, 0) for sq in range(64)], dtype=np.float64)
+
+def batch_pattern_indices(own, opp):
+    o = np.unpackbits(own.astype("<u8").view(np.uint8).reshape(-1, 8), axis=1, bitorder="little")
+    p = np.unpackbits(opp.astype("<u8").view(np.uint8).reshape(-1, 8), axis=1, bitorder="little")
+    return ((o + 2 * p) @ POWERS).astype(np.int64)
+
+def stage_of(discs):
+    return (discs - 4) * N_STAGES // 61
+
+# 单个局面求值用：下标对格子状态是线性的，把每行 8 格的贡献预先加好。第 x 行的 6561 种状态（三进制值即 T[己方][对方]）
+# 各存一个大整数，每 32 位是一个实例的下标；8 行的大整数与阶段起点相加后按 uint32 拆开，就是各实例在权重数组中的位置
+_DIGITS = np.arange(3 ** 8)[:, None] // 3 ** np.arange(8) % 3
+_N_BYTES = 4 * len(INSTANCE_PATTERNS)
+ROW_TABLES = [[int.from_bytes(r.tobytes(), sys.byteorder)
+               for r in (_DIGITS @ POWERS[x * 8:x * 8 + 8]).astype(np.uint32)] for x in range(8)]
+STAGE_BASES = [int.from_bytes(np.array(offsets, dtype=np.uint32).tobytes(), sys.byteorder)
+               for offsets in _STAGE_OFFSETS]
+
+# 由 SQUARE_WEIGHTS 生成的默认表：每个实例把格子的位置分按该格被实例覆盖的次数平分，总和即位置分
+def default_weights():
+    coverage = (POWERS != 0).sum(axis=1)  # 每格被几个实例覆盖
+    flat = np.array(SQUARE_WEIGHTS, dtype=np.float64).reshape(64)
+    table = np.zeros(TABLE_SIZE, dtype=np.float32)
+    for p, (_, n, squares) in enumerate(PATTERNS):
+        idx = np.arange(3 ** n)
+        values = np.zeros(3 ** n)
+        for j, s in enumerate(squares):
+            digit = idx // 3 ** j % 3
+            values += ((digit == 1) * 1.0 - (digit == 2)) * flat[s] / coverage[s]
+        table[OFFSETS[p]:OFFSETS[p + 1]] = values
+    return np.tile(table, N_STAGES)
+
+_weights = None
+_lookup = None  # 单个局面查表用：权重数组的 memoryview 取下标，比 ndarray.item 快
+
+# 权重按需加载：有 WEIGHTS_PATH 则内存映射，否则用默认表
+def load_weights(path=WEIGHTS_PATH):
+    global _weights, _lookup
+    if os.path.exists(path):
+        w = np.load(path, mmap_mode="r")
+        if w.shape != (N_STAGES * TABLE_SIZE,) or w.dtype != np.float32:
+            raise ValueError(f"{path} 的表长度或类型不符")
+    else:
+        w = default_weights()
+    _weights, _lookup = w, memoryview(w).__getitem__
+    return w
+
+def pattern_eval(board, color):
+    if _weights is None:
+        load_weights()
+    own, opp = board.bits(color)
+    o, p = own.to_bytes(8, "little"), opp.to_bytes(8, "little")
+    r0, r1, r2, r3, r4, r5, r6, r7 = ROW_TABLES
+    ids = (STAGE_BASES[stage_of(board.black_count + board.white_count)] +
+           r0[T[o[0]][p[0]]] + r1[T[o[1]][p[1]]] + r2[T[o[2]][p[2]]] + r3[T[o[3]][p[3]]] +
+           r4[T[o[4]][p[4]]] + r5[T[o[5]][p[5]]] + r6[T[o[6]][p[6]]] + r7[T[o[7]][p[7]]])
+    return sum(map(_lookup, memoryview(ids.to_bytes(_N_BYTES, sys.byteorder)).cast("I")))
+
+def feature_ids(own, opp):
+    stage = stage_of(batch_popcount(own | opp)) * TABLE_SIZE
+    return batch_pattern_indices(own, opp) + INSTANCE_OFFSETS + stage[:, None]
+
+def batch_pattern_eval(own, opp):
+    w = _weights if _weights is not None else load_weights()
+    return w[feature_ids(own, opp)].sum(axis=1, dtype=np.float64)
+
+BATCH_EVALS[pattern_eval] = batch_pattern_eval
+
+# ---- 用自对弈数据（selfplay.py）拟合权重 ----
+# 目标为行棋方视角的终局子数差；逐批做最小二乘的梯度步，每个特征的步长按它在该批中出现的次数归一
+# 目标为 NaN 的记录（如 score 列中没有搜索分数的玩家）跳过
+def fit(chunks, epochs=4, lr=0.5, batch_size=1 << 16, target="disc_diff", verbose=True):
+    w = np.zeros(N_STAGES * TABLE_SIZE, dtype=np.float64)
+    n_instances = len(INSTANCE_PATTERNS)
+    for epoch in range(epochs):
+        total_err, n = 0.0, 0
+        for chunk in chunks:
+            for start in range(0, len(chunk), batch_size):
+                part = chunk[start:start + batch_size]
+                part = part[np.isfinite(part[target])]
+                if not len(part):
+                    continue
+                black = part["black"].astype(np.uint64)
+                white = part["white"].astype(np.uint64)
+                is_black = part["color"] == 1
+                own = np.where(is_black, black, white)
+                opp = np.where(is_black, white, black)
+                ids = feature_ids(own, opp)
+                err = part[target].astype(np.float64) - w[ids].sum(axis=1)
+                grad = np.bincount(ids.ravel(), weights=np.repeat(err, n_instances), minlength=w.size)
+                count = np.bincount(ids.ravel(), minlength=w.size)
+                w += lr * grad / (count + 1) / n_instances
+                total_err += float((err ** 2).sum())
+                n += len(part)
+        if verbose:
+            print(f"第 {epoch + 1} 轮  均方误差 {total_err / max(n, 1):.2f}", file=sys.stderr)
+    return w.astype(np.float32)
+
+def save_weights(w, path=WEIGHTS_PATH):
+    folder = os.path.dirname(path)
+    if folder and not os.path.exists(folder):
+        os.makedirs(folder)
+    np.save(path, w)
+
+if __name__ == "__main__":
+    from selfplay import load_dataset, DATA_DIR
+    parser = argparse.ArgumentParser(description="用自对弈数据拟合模式评估的权重表")
+    parser.add_argument("--data", default=DATA_DIR)
+    parser.add_argument("--out", default=WEIGHTS_PATH)
+    parser.add_argument("--epochs", type=int, default=4)
+    parser.add_argument("--lr", type=float, default=0.5)
+    parser.add_argument("--target", default="disc_diff", choices=["disc_diff", "result", "score"])
+    args = parser.parse_args()
+    chunks = load_dataset(args.data)
+    if not chunks:
+        parser.error(f"{args.data} 中没有数据，先运行 selfplay.py")
+    start = time.perf_counter()
+    weights = fit(chunks, args.epochs, args.lr, target=args.target)
+    save_weights(weights, args.out)
+    print(f"{sum(len(c) for c in chunks)} 个局面，用时 {time.perf_counter() - start:.1f}s，已保存到 {args.out}")
@@ -0,0 +1,146 @@
+import sys, time, argparse
+import numpy as np
+from board import Board, BLACK, EMPTY, DIRECTIONS
+
+# 标准初始局面（黑先）的 perft 叶子数：跳过算一步，提前终局的局面算一个叶子
+REFERENCE_COUNTS = {
+    1: 4, 2: 12, 3: 56, 4: 244, 5: 1396, 6: 8200, 7: 55092, 8: 390216,
+    9: 3005288, 10: 24571284, 11: 212258800, 12: 1939886636,
+    13: 18429641748, 14: 184042084512,
+}
+
+# 从初始局面走 moves（None 表示跳过），返回 (board, 轮到的一方)
+def load_position(moves):
+    board, color = Board(), BLACK
+    for move in moves:
+        if move is not None and not board.do_move(move, color):
+            raise ValueError(f"非法着法 {move}")
+        color = -color
+    return board, color
+
+def perft(board, color, depth, passed=False):
+    if depth == 0:
+        return 1
+    moves = board.get_legal_moves(color)
+    if not moves:
+        if passed:  # 双方都无子可下，终局也算一个叶子
+            return 1
+        return perft(board, -color, depth - 1, True)
+    total = 0
+    for move in moves:
+        flipped = board.make_move(move, color)
+        total += perft(board, -color, depth - 1)
+        board.undo_move(move, color, flipped)
+    return total
+
+# 按根节点着法拆分叶子数；根节点只能跳过时键为 None
+def divide(board, color, depth):
+    if depth == 0:
+        return {}
+    moves = board.get_legal_moves(color)
+    if not moves:
+        return {None: perft(board, -color, depth - 1, True)}
+    counts = {}
+    for move in moves:
+        flipped = board.make_move(move, color)
+        counts[move] = perft(board, -color, depth - 1)
+        board.undo_move(move, color, flipped)
+    return counts
+
+# ---- 参照实现：原先逐格逐方向扫描 8x8 数组的走法生成，用于校验位棋盘 ----
+def reference_legal_moves(arr, color):
+    n = arr.shape[0]
+    legal = set()
+    for i in range(n):
+        for j in range(n):
+            if arr[i][j] != EMPTY:
+                continue
+            for dx, dy in DIRECTIONS:
+                x, y = i+dx, j+dy
+                found_opponent = False
+                while 0 <= x < n and 0 <= y < n and arr[x][y] == -color:
+                    found_opponent = True
+                    x, y = x+dx, y+dy
+                if found_opponent and 0 <= x < n and 0 <= y < n and arr[x][y] == color:
+                    legal.add((i, j))
+                    break
+    return legal
+
+def reference_do_move(arr, move, color):
+    n = arr.shape[0]
+    x0, y0 = move
+    arr[x0][y0] = color
+    for dx, dy in DIRECTIONS:
+        x, y = x0+dx, y0+dy
+        to_flip = []
+        while 0 <= x < n and 0 <= y < n and arr[x][y] == -color:
+            to_flip.append((x, y))
+            x, y = x+dx, y+dy
+        if to_flip and 0 <= x < n and 0 <= y < n and arr[x][y] == color:
+            for fx, fy in to_flip:
+                arr[fx][fy] = color
+
+# 遍历到 depth 层，逐节点比较 Board 与参照实现的合法着法及落子结果，返回不一致处（最多 limit 条）
+def verify(board, color, depth, limit=10):
+    errors = []
+    def walk(depth, color, path):
+        if depth == 0 or len(errors) >= limit:
+            return
+        moves = board.get_legal_moves(color)
+        expected = reference_legal_moves(board.board, color)
+        if set(moves) != expected:
+            errors.append((list(path), "legal moves", sorted(moves), sorted(expected)))
+            return
+        if not moves:
+            if reference_legal_moves(board.board, -color):
+                walk(depth - 1, -color, path + [None])
+            return
+        for move in moves:
+            arr = np.array(board.board)
+            reference_do_move(arr, move, color)
+            flipped = board.make_move(move, color)
+            if not np.array_equal(board.board, arr):
+                errors.append((list(path) + [move], "board after move", None, None))
+            else:
+                walk(depth - 1, -color, path + [move])
+            board.undo_move(move, color, flipped)
+    walk(depth, color, [])
+    return errors
+
+def parse_moves(text):
+    moves = []
+    for token in text.split(",") if text else []:
+        token = token.strip()
+        moves.append(None if token == "pass" else tuple(int(v) for v in token.split()))
+    return moves
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="perft：走法生成正确性与速度检查")
+    parser.add_argument("depth", type=int)
+    parser.add_argument("--moves", default="", help="起始局面的着法序列，如 \"2 3,2 2,pass\"（默认初始局面）")
+    parser.add_argument("--divide", action="store_true", help="按根节点着法拆分计数")
+    parser.add_argument("--verify", action="store_true", help="逐节点与参照实现比较（很慢）")
+    args = parser.parse_args()
+    moves = parse_moves(args.moves)
+    board, color = load_position(moves)
+    start = time.perf_counter()
+    if args.divide:
+        counts = divide(board, color, args.depth)
+        for move, n in counts.items():
+            print(f"{'pass' if move is None else '%d %d' % move}: {n}")
+        total = sum(counts.values())
+    else:
+        total = perft(board, color, args.depth)
+    elapsed = time.perf_counter() - start
+    print(f"perft({args.depth}) = {total}  {elapsed:.2f}s  {total / elapsed:,.0f} nodes/s")
+    ok = True
+    if not moves and args.depth in REFERENCE_COUNTS:
+        ok = total == REFERENCE_COUNTS[args.depth]
+        print("与标准值一致" if ok else f"错误！标准值为 {REFERENCE_COUNTS[args.depth]}")
+    if args.verify:
+        errors = verify(board, color, args.depth)
+        for e in errors:
+            print("不一致:", e)
+        print("参照实现校验通过" if not errors else f"{len(errors)} 处不一致")
+        ok = ok and not errors
+    sys.exit(0 if ok else 1)
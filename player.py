@@ -7,6 +7,9 @@ class Player:
     def get_move(self, board):
         raise NotImplementedError
 
+    def new_game(self):
+        pass
+
 class HumanPlayer(Player):
     def get_move(self, board):
         board.print_board()
@@ -0,0 +1,180 @@
+import os, json, struct, datetime
+from board import Board, BLACK
+
+# 紧凑的二进制棋谱：文件头魔数之后逐盘追加记录，可流式读写任意多盘
+# 每盘：头部长度(uint16) + 步数(uint8) + 头部（JSON 元数据，可为空）+ 每步一个字节（格子 0..63，64 表示跳过）
+# 棋盘不存储，需要时由着法重建
+MAGIC = b"ORP1"
+RECORD = struct.Struct("<HB")
+PASS = 64
+REPLAY_EXT = ".rpl"
+
+def encode_moves(moves):
+    return bytes(PASS if m is None else m[0] * 8 + m[1] for m in moves)
+
+def decode_moves(data):
+    return [None if b == PASS else divmod(b, 8) for b in data]
+
+class GameRecord:
+    # moves 为着法序列（None 表示跳过），header 为元数据字典（黑白双方、结果、日期等）
+    def __init__(self, moves, header=None):
+        self.moves = [None if m is None else tuple(m) for m in moves]
+        self.header = header or {}
+
+    def __len__(self):
+        return len(self.moves)
+
+    # 依次产生 (落子前的局面, 行棋方, 着法)；局面对象会被复用，需要保留时请 copy()
+    def positions(self):
+        board, color = Board(), BLACK
+        for move in self.moves:
+            yield board, color, move
+            if move is not None:
+                board.make_move(move, color)
+            color = -color
+
+    # 走完前 ply 步后的 (局面, 轮到的一方)
+    def board_at(self, ply):
+        board, color = Board(), BLACK
+        for move in self.moves[:ply]:
+            if move is not None:
+                board.make_move(move, color)
+            color = -color
+        return board, color
+
+    # 黑方视角 1/0/-1；头部没有记录时由终局子数计算
+    def result(self):
+        if "result" in self.header:
+            return self.header["result"]
+        b, w = self.board_at(len(self.moves))[0].count()
+        return (b > w) - (w > b)
+
+# 在一盘棋中任意跳转：只保存着法，每 interval 步记一个检查点（局面快照），跳转时从最近的检查点重走不到 interval 步
+# 局面总是写在同一个 Board 对象里，界面可以一直持有 cursor.board
+CHECKPOINT_INTERVAL = 8
+
+class ReplayCursor:
+    def __init__(self, record, interval=CHECKPOINT_INTERVAL):
+        self.record = record
+        self.interval = interval
+        self.board = Board()
+        self.ply = 0
+        self.checkpoints = [self.board.snapshot()]
+
+    def __len__(self):
+        return len(self.record.moves)
+
+    # 第 ply 步（从 0 数）的行棋方；跳过也记为一步，所以黑白严格交替
+    @staticmethod
+    def color_at(ply):
+        return BLACK if ply % 2 == 0 else -BLACK
+
+    # 走到第 ply 步之后的局面（0 为初始局面），返回 (局面, 轮到的一方)
+    def seek(self, ply):
+        ply = max(0, min(ply, len(self.record.moves)))
+        base = min(ply // self.interval, len(self.checkpoints) - 1)
+        if ply < self.ply or base * self.interval > self.ply:
+            self.board.restore(self.checkpoints[base])
+            self.ply = base * self.interval
+        while self.ply < ply:
+            move = self.record.moves[self.ply]
+            if move is not None:
+                self.board.make_move(move, self.color_at(self.ply))
+            self.ply += 1
+            if self.ply % self.interval == 0 and self.ply // self.interval == len(self.checkpoints):
+                self.checkpoints.append(self.board.snapshot())
+        return self.board, self.color_at(self.ply)
+
+    # 导致第 ply 步局面的那一步：(行棋方, 着法)，初始局面为 (None, None)
+    def move_before(self, ply):
+        if ply == 0:
+            return None, None
+        return self.color_at(ply - 1), self.record.moves[ply - 1]
+
+class ReplayWriter:
+    # 追加写入；文件不存在或为空时先写魔数
+    def __init__(self, path):
+        folder = os.path.dirname(path)
+        if folder and not os.path.exists(folder):
+            os.makedirs(folder)
+        self.f = open(path, "ab")
+        if self.f.tell() == 0:
+            self.f.write(MAGIC)
+
+    def write(self, moves, header=None):
+        head = json.dumps(header, separators=(",", ":")).encode("utf-8") if header else b""
+        data = encode_moves(moves)
+        self.f.write(RECORD.pack(len(head), len(data)))
+        self.f.write(head)
+        self.f.write(data)
+
+    def flush(self):
+        self.f.flush()
+
+    def close(self):
+        self.f.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+# 逐盘读出 GameRecord，不会一次载入整个文件
+def iter_games(path):
+    with open(path, "rb") as f:
+        if f.read(len(MAGIC)) != MAGIC:
+            raise ValueError(f"{path} 不是棋谱文件")
+        while True:
+            raw = f.read(RECORD.size)
+            if len(raw) < RECORD.size:
+                return
+            head_len, n_moves = RECORD.unpack(raw)
+            head = f.read(head_len)
+            data = f.read(n_moves)
+            if len(head) < head_len or len(data) < n_moves:
+                raise ValueError(f"{path} 末尾的记录不完整")
+            yield GameRecord(decode_moves(data), json.loads(head) if head else None)
+
+# 原有 JSON 复盘文件：第一条是初始局面，之后每条记录一步（move 为 None 表示跳过），末尾可能有一条终局快照
+# 界面下棋时对方无子可下不会单独记一步，同一方连走时补上跳过
+def load_json_replay(path):
+    with open(path, encoding="utf-8") as f:
+        records = json.load(f)
+    moves, color = [], BLACK
+    for r in records[1:]:
+        if r["color"] is None:
+            continue
+        if r["color"] != color:
+            moves.append(None)
+        moves.append(r["move"])
+        color = -r["color"]
+    return GameRecord(moves)
+
+# 按扩展名读出文件中的所有对局：.json 为原格式（一盘），其余按二进制棋谱流式读取
+def read_games(path):
+    if path.endswith(".json"):
+        yield load_json_replay(path)
+    else:
+        yield from iter_games(path)
+
+def save_game(moves, header=None, folder="replays"):
+    fname = f"{folder}/replay_{datetime.datetime.now().strftime('%Y%m%d-%H%M%S')}{REPLAY_EXT}"
+    with ReplayWriter(fname) as w:
+        w.write(moves, header)
+    return fname
+
+# 把 JSON 复盘文件追加到一个二进制棋谱文件中
+if __name__ == "__main__":
+    import sys, glob
+    if len(sys.argv) < 3:
+        print("用法: python replay.py 输出.rpl 输入.json ...")
+        sys.exit(1)
+    with ReplayWriter(sys.argv[1]) as w:
+        n = 0
+        for pattern in sys.argv[2:]:
+            for path in sorted(glob.glob(pattern)):
+                for game in read_games(path):
+                    w.write(game.moves, game.header)
+                    n += 1
+    print(f"已写入 {n} 盘到 {sys.argv[1]}")
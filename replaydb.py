@@ -0,0 +1,164 @@
+import os, glob, json, sqlite3, argparse
+from itertools import islice
+from board import BLACK
+from replay import GameRecord, read_games, encode_moves, decode_moves, PASS, REPLAY_EXT
+from perft import load_position, parse_moves
+
+# 本地棋谱库（SQLite）：games 存每盘的元数据与着法，positions 以 (局面键, 对局, 步数) 为主键聚簇存放，
+# 局面键为 Board.key(行棋方)，即区分行棋方的 Zobrist 哈希；同一局面的所有记录在磁盘上相邻，按局面查询只需一次范围扫描
+DB_PATH = "replays/replays.db"
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS games (
+    id INTEGER PRIMARY KEY,
+    black TEXT, white TEXT,
+    result INTEGER, black_discs INTEGER, white_discs INTEGER,
+    moves BLOB, header TEXT, source TEXT
+);
+CREATE INDEX IF NOT EXISTS games_black ON games(black);
+CREATE INDEX IF NOT EXISTS games_white ON games(white);
+CREATE TABLE IF NOT EXISTS positions (
+    key INTEGER, game INTEGER, ply INTEGER, move INTEGER,
+    PRIMARY KEY (key, game, ply)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS sources (path TEXT PRIMARY KEY, games INTEGER);
+"""
+
+# SQLite 的整数是有符号 64 位
+def signed(key):
+    return key - (1 << 64) if key >= 1 << 63 else key
+
+class ReplayDB:
+    def __init__(self, path=DB_PATH):
+        folder = os.path.dirname(path)
+        if folder and not os.path.exists(folder):
+            os.makedirs(folder)
+        self.conn = sqlite3.connect(path)
+        self.conn.executescript(SCHEMA)
+        # 旧库的 sources 没有 games 列：补上，已有记录的盘数留空，导入时按 games 表现数
+        if "games" not in [row[1] for row in self.conn.execute("PRAGMA table_info(sources)")]:
+            self.conn.execute("ALTER TABLE sources ADD COLUMN games INTEGER")
+
+    def close(self):
+        self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    # 写入一盘（不提交事务），返回对局 id
+    def add_game(self, record, source=None):
+        header = record.header
+        rows = []
+        board, color = record.board_at(0)
+        for ply, move in enumerate(record.moves):
+            rows.append((signed(board.key(color)), ply, PASS if move is None else move[0] * 8 + move[1]))
+            if move is not None:
+                board.make_move(move, color)
+            color = -color
+        # 终局局面也要能查到（没有后续着法）
+        rows.append((signed(board.key(color)), len(record), None))
+        b, w = board.count()
+        result = header.get("result", (b > w) - (w > b))
+        cur = self.conn.execute(
+            "INSERT INTO games (black, white, result, black_discs, white_discs, moves, header, source) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            (header.get("black"), header.get("white"), result, b, w, encode_moves(record.moves),
+             json.dumps(header) if header else None, source))
+        game_id = cur.lastrowid
+        self.conn.executemany("INSERT OR IGNORE INTO positions (key, game, ply, move) VALUES (?, ?, ?, ?)",
+                              [(key, game_id, ply, move) for key, ply, move in rows])
+        return game_id
+
+    # 导入文件中尚未导入的对局，返回导入的盘数
+    # 二进制棋谱只会在末尾追加，sources 记下每个文件已导入的盘数，再次导入时跳过这些盘、从后面接着导
+    def ingest(self, path):
+        source = os.path.abspath(path)
+        row = self.conn.execute("SELECT games FROM sources WHERE path = ?", (source,)).fetchone()
+        done = 0
+        if row is not None:
+            done = row[0] if row[0] is not None else \
+                self.conn.execute("SELECT COUNT(*) FROM games WHERE source = ?", (source,)).fetchone()[0]
+        n = 0
+        with self.conn:
+            for record in islice(read_games(path), done, None):
+                self.add_game(record, source)
+                n += 1
+            self.conn.execute("INSERT OR REPLACE INTO sources (path, games) VALUES (?, ?)", (source, done + n))
+        return n
+
+    def game(self, game_id):
+        row = self.conn.execute("SELECT moves, header FROM games WHERE id = ?", (game_id,)).fetchone()
+        return GameRecord(decode_moves(row[0]), json.loads(row[1]) if row[1] else None) if row else None
+
+    # 经过该局面（且轮到 color 走）的所有对局：[(对局 id, 步数, 黑, 白, 结果)]
+    def games_through(self, board, color, limit=None):
+        sql = ("SELECT g.id, p.ply, g.black, g.white, g.result FROM positions p JOIN games g ON g.id = p.game "
+               "WHERE p.key = ? ORDER BY g.id")
+        args = [signed(board.key(color))]
+        if limit:
+            sql += " LIMIT ?"
+            args.append(limit)
+        return self.conn.execute(sql, args).fetchall()
+
+    # 该局面下每个着法的 {着法: (盘数, 胜, 平, 负, 得分率)}，胜负按行棋方计；跳过记为 None
+    def move_stats(self, board, color):
+        rows = self.conn.execute(
+            "SELECT p.move, COUNT(*), SUM(g.result = ?), SUM(g.result = 0), SUM(g.result = ?) "
+            "FROM positions p JOIN games g ON g.id = p.game "
+            "WHERE p.key = ? AND p.move IS NOT NULL GROUP BY p.move",
+            (color, -color, signed(board.key(color)))).fetchall()
+        stats = {}
+        for move, n, wins, draws, losses in rows:
+            stats[None if move == PASS else divmod(move, 8)] = (n, wins, draws, losses, (wins + 0.5 * draws) / n)
+        return stats
+
+    # 某个参赛者配置的对局；color 为 BLACK/WHITE 时只看执该色的
+    def games_by_player(self, name, color=None, limit=None):
+        if color is None:
+            where, args = "black = ? OR white = ?", [name, name]
+        else:
+            where, args = ("black = ?" if color == BLACK else "white = ?"), [name]
+        sql = f"SELECT id, black, white, result, black_discs, white_discs FROM games WHERE {where} ORDER BY id"
+        if limit:
+            sql += " LIMIT ?"
+            args.append(limit)
+        return self.conn.execute(sql, args).fetchall()
+
+    def count(self):
+        return self.conn.execute("SELECT COUNT(*) FROM games").fetchone()[0]
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="棋谱库：导入与按局面查询")
+    parser.add_argument("--db", default=DB_PATH)
+    sub = parser.add_subparsers(dest="cmd", required=True)
+    p_ingest = sub.add_parser("ingest", help="导入棋谱文件（.json 或二进制棋谱）")
+    p_ingest.add_argument("files", nargs="*", default=["replays/*.json", "replays/*" + REPLAY_EXT])
+    p_pos = sub.add_parser("position", help="经过某局面的对局与各着法胜率")
+    p_pos.add_argument("--moves", default="", help="从初始局面走到该局面的着法，如 \"2 3,2 2,pass\"")
+    p_pos.add_argument("--limit", type=int, default=20)
+    p_player = sub.add_parser("player", help="某参赛者配置的对局")
+    p_player.add_argument("name")
+    p_player.add_argument("--limit", type=int, default=20)
+    args = parser.parse_args()
+    with ReplayDB(args.db) as db:
+        if args.cmd == "ingest":
+            for pattern in args.files:
+                for path in sorted(glob.glob(pattern)):
+                    print(f"{path}: {db.ingest(path)} 盘")
+            print(f"共 {db.count()} 盘")
+        elif args.cmd == "position":
+            board, color = load_position(parse_moves(args.moves))
+            games = db.games_through(board, color)
+            print(f"{len(games)} 盘经过该局面（{'黑' if color == BLACK else '白'}方行棋）")
+            for move, (n, wins, draws, losses, score) in sorted(db.move_stats(board, color).items(),
+                                                                 key=lambda kv: -kv[1][0]):
+                name = "pass" if move is None else "%d %d" % move
+                print(f"  {name:>5}: {n} 盘  胜{wins} 平{draws} 负{losses}  得分率{score:.3f}")
+            for game_id, ply, black, white, result in games[:args.limit]:
+                print(f"  #{game_id} 第{ply}步  {black or '?'}(黑) vs {white or '?'}(白)  结果{result:+d}")
+        else:
+            games = db.games_by_player(args.name, limit=args.limit)
+            for game_id, black, white, result, b, w in games:
+                print(f"#{game_id} {black}(黑) {b}:{w} {white}(白)")
@@ -0,0 +1,159 @@
+import queue, traceback, multiprocessing
+from board import Board
+from ai_minimax import SearchCancelled
+
+# 常驻的 AI 搜索进程：界面只发命令、收结果，纯 Python 搜索占着 GIL 也不会卡住界面
+# 命令（commands 队列）：
+#   ("player", key, player)                    登记/替换一个 AI 玩家对象（之后一直留在子进程里，置换表跨步保留）
+#   ("new_game", key)                          调用该玩家的 new_game()
+#   ("search", 请求号, key, 黑位棋盘, 白位棋盘)  在该局面上为玩家 key（其 color 为行棋方）找一步
+#   ("ponder", 请求号, key, 黑位棋盘, 白位棋盘)  对手行棋时预想：逐个搜索对手的每种应着之后的局面，
+#                                               直到取消或有新命令到达；搜完的结果按局面哈希缓存
+#   ("quit",)
+# 结果（results 队列）：("progress", 请求号, 统计)、("done", 请求号, 着法, 统计)、("cancelled", 请求号)、
+# ("error", 请求号, 错误信息)
+# 取消：共享的 cancel_id 不小于请求号即视为取消；用请求号而不是单个 Event，新的搜索不会被取消旧搜索的信号误伤
+# 对手真正落子后发来的 search 若命中预想缓存则立即返回；未搜完的那一步留在置换表里，接着搜会快得多
+
+# 供 MiniMaxAI.stop 使用的取消标志
+class _Cancelled:
+    def __init__(self, cancel_id, request_id):
+        self.cancel_id = cancel_id
+        self.request_id = request_id
+
+    def is_set(self):
+        return self.cancel_id.value >= self.request_id
+
+# 预想还要给新命令让路
+class _PonderStop(_Cancelled):
+    def __init__(self, cancel_id, request_id, commands):
+        super().__init__(cancel_id, request_id)
+        self.commands = commands
+
+    def is_set(self):
+        return self.cancel_id.value >= self.request_id or not self.commands.empty()
+
+# 先搜最可能的应着：上一步搜索的主变例里对手的着法（置换表着法）排在最前
+def _ponder(player, board, stop, cache):
+    color = -player.color
+    legal = board.get_legal_moves(color)
+    legal = player.order_moves(legal, color, 0, player.tt_move(board, color))
+    time_used = player.time_used  # 预想不占 AI 自己的用时
+    player.stop = stop
+    try:
+        for move in legal:
+            child = board.copy()
+            child.make_move(move, color)
+            key = child.key(player.color)
+            if key in cache or not child.legal_mask(player.color):
+                continue
+            cache[key] = player.search(child)
+    except SearchCancelled:
+        pass
+    finally:
+        player.stop = None
+        player.time_used = time_used
+
+def _worker_main(commands, results, cancel_id):
+    players = {}
+    pondered = {}  # 玩家 -> {局面哈希: (着法, 统计)}
+    while True:
+        cmd = commands.get()
+        kind = cmd[0]
+        if kind == "quit":
+            return
+        if kind == "player":
+            players[cmd[1]] = cmd[2]
+            pondered[cmd[1]] = {}
+        elif kind == "new_game":
+            if hasattr(players[cmd[1]], "new_game"):
+                players[cmd[1]].new_game()
+            pondered[cmd[1]] = {}
+        elif kind == "ponder":
+            request_id, key, black_bits, white_bits = cmd[1:]
+            player = players[key]
+            if cancel_id.value >= request_id or not hasattr(player, "search"):
+                continue
+            cache = pondered[key]
+            cache.clear()
+            try:
+                _ponder(player, Board.from_bits(black_bits, white_bits), _PonderStop(cancel_id, request_id, commands),
+                        cache)
+            except Exception:
+                results.put(("error", request_id, traceback.format_exc()))
+        elif kind == "search":
+            request_id, key, black_bits, white_bits = cmd[1:]
+            if cancel_id.value >= request_id:
+                results.put(("cancelled", request_id))
+                continue
+            player = players[key]
+            board = Board.from_bits(black_bits, white_bits)
+            hit = pondered[key].pop(board.key(player.color), None)
+            pondered[key].clear()
+            if hit is not None:
+                move, stats = hit
+                results.put(("done", request_id, move, dict(stats, pondered=True)))
+                continue
+            try:
+                if hasattr(player, "search"):
+                    player.stop = _Cancelled(cancel_id, request_id)
+                    player.on_progress = lambda stats: results.put(("progress", request_id, stats))
+                    try:
+                        move, stats = player.search(board)
+                    finally:
+                        player.stop = player.on_progress = None
+                else:
+                    move, stats = player.get_move(board), None
+                results.put(("done", request_id, move, stats))
+            except SearchCancelled:
+                results.put(("cancelled", request_id))
+            except Exception:
+                results.put(("error", request_id, traceback.format_exc()))
+
+class SearchWorker:
+    def __init__(self):
+        self.commands = multiprocessing.Queue()
+        self.results = multiprocessing.Queue()
+        self.cancel_id = multiprocessing.Value("q", 0, lock=False)
+        self.last_id = 0
+        self.process = multiprocessing.Process(target=_worker_main, args=(self.commands, self.results, self.cancel_id),
+                                               daemon=True)
+        self.process.start()
+
+    def set_player(self, key, player):
+        self.commands.put(("player", key, player))
+
+    def new_game(self, key):
+        self.commands.put(("new_game", key))
+
+    # 提交搜索，返回请求号；结果由 poll() 取回
+    def search(self, key, board):
+        self.last_id += 1
+        self.commands.put(("search", self.last_id, key, board.black_bits, board.white_bits))
+        return self.last_id
+
+    # 在对手（board 上的行棋方）思考时为玩家 key 预想，返回请求号；不产生结果，cancel() 或下一条命令即停止
+    def ponder(self, key, board):
+        self.last_id += 1
+        self.commands.put(("ponder", self.last_id, key, board.black_bits, board.white_bits))
+        return self.last_id
+
+    # 取消已提交的所有搜索与预想（正在进行的会尽快中止，排队中的直接跳过）
+    def cancel(self):
+        self.cancel_id.value = self.last_id
+
+    # 不阻塞地取出目前已到达的所有结果
+    def poll(self):
+        messages = []
+        while True:
+            try:
+                messages.append(self.results.get_nowait())
+            except queue.Empty:
+                return messages
+
+    def close(self):
+        self.cancel()
+        self.commands.put(("quit",))
+        self.process.join(timeout=1.0)
+        if self.process.is_alive():
+            self.process.terminate()
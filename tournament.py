@@ -0,0 +1,174 @@
+import os, json, time, random, datetime, argparse, itertools, multiprocessing
+from board import Board, BLACK, WHITE
+from game import Game
+from ai_greedy import GreedyAI
+from ai_minimax import MiniMaxAI
+from evaluate import full_eval, base_eval
+from pattern import pattern_eval
+from elo import SPRT, report
+from book import BOOK_PATH
+from replay import ReplayWriter
+
+# 参赛者配置与 ui_tkinter.AI_LEVELS 相同：ai_class 加上构造参数
+PLAYER_CONFIGS = {
+    "Greedy": {"ai_class": GreedyAI},
+    "MiniMax-3": {"ai_class": MiniMaxAI, "depth": 3, "eval_fn": base_eval},
+    "MiniMax-6+": {"ai_class": MiniMaxAI, "depth": 6, "eval_fn": full_eval},
+    "Pattern-6": {"ai_class": MiniMaxAI, "depth": 6, "eval_fn": pattern_eval},
+    "MiniMax-2s": {"ai_class": MiniMaxAI, "depth": 60, "time_limit": 2.0, "eval_fn": full_eval},
+    # 与 MiniMax-6+ 相同但先查开局库，用于衡量开局库的收益
+    "MiniMax-6+book": {"ai_class": MiniMaxAI, "depth": 6, "eval_fn": full_eval, "book": BOOK_PATH},
+}
+
+def make_player(conf, color):
+    return conf["ai_class"](color, **{k: v for k, v in conf.items() if k != "ai_class"})
+
+# 生成互不相同的随机开局（着法序列），固定种子保证可复现
+def random_openings(n, plies=6, seed=0):
+    rng = random.Random(seed)
+    openings, seen = [], set()
+    while len(openings) < n:
+        board, color, moves = Board(), BLACK, []
+        while len(moves) < plies:
+            legal = board.get_legal_moves(color)
+            if not legal:
+                break
+            move = rng.choice(legal)
+            board.do_move(move, color)
+            moves.append(move)
+            color = -color
+        if len(moves) == plies and board.hash not in seen:
+            seen.add(board.hash)
+            openings.append(moves)
+    return openings
+
+def play_game(task):
+    black_name, white_name, black_conf, white_conf, opening_idx, opening = task
+    game = Game(make_player(black_conf, BLACK), make_player(white_conf, WHITE))
+    for move in opening:
+        game.play(move)
+    game_start = time.perf_counter()
+    result = game.run()
+    for p in game.players.values():
+        if hasattr(p, "close"):
+            p.close()
+    b, w = game.board.count()
+    return {
+        "black": black_name, "white": white_name, "opening": opening_idx, "opening_plies": len(opening),
+        "black_discs": b, "white_discs": w, "result": result,
+        "black_time_per_move": game.think_time[BLACK] / max(1, game.move_count[BLACK]),
+        "white_time_per_move": game.think_time[WHITE] / max(1, game.move_count[WHITE]),
+        "game_time": time.perf_counter() - game_start,
+        "moves": [None if m is None else list(m) for m in game.moves],
+    }
+
+def round_robin(names):
+    return list(itertools.combinations(names, 2))
+
+def gauntlet(challenger, opponents):
+    return [(challenger, o) for o in opponents if o != challenger]
+
+# 每个对阵、每个开局各下两盘，双方轮换执黑
+def schedule(pairs, configs, openings):
+    tasks = []
+    for a, b in pairs:
+        for idx, opening in enumerate(openings):
+            tasks.append((a, b, configs[a], configs[b], idx, opening))
+            tasks.append((b, a, configs[b], configs[a], idx, opening))
+    return tasks
+
+# name 对其他参赛者的 (胜, 平, 负)
+def head_to_head(results, name):
+    wins = draws = losses = 0
+    for r in results:
+        if name not in (r["black"], r["white"]):
+            continue
+        outcome = r["result"] if r["black"] == name else -r["result"]
+        wins += outcome > 0
+        draws += outcome == 0
+        losses += outcome < 0
+    return wins, draws, losses
+
+def summarize(results):
+    table = {}
+    for r in results:
+        for name, sign, key in ((r["black"], 1, "black"), (r["white"], -1, "white")):
+            s = table.setdefault(name, {"games": 0, "wins": 0, "losses": 0, "draws": 0,
+                                        "disc_margin": 0, "time_per_move": 0.0})
+            outcome = r["result"] * sign
+            s["games"] += 1
+            s["wins"] += outcome > 0
+            s["losses"] += outcome < 0
+            s["draws"] += outcome == 0
+            s["disc_margin"] += (r["black_discs"] - r["white_discs"]) * sign
+            s["time_per_move"] += r[key + "_time_per_move"]
+    for s in table.values():
+        s["disc_margin"] /= s["games"]
+        s["time_per_move"] /= s["games"]
+    return table
+
+# 并行对局，每盘结束即追加一行 JSON 到 out_path；返回全部对局结果
+# replay_out 给定时每盘棋谱同时追加到该二进制棋谱文件（见 replay.py）
+# sprt 为 elo.SPRT 时只允许一组对阵，一旦检验有结论即停止剩余对局（结论以 pairs[0][0] 为测试方）
+# 注意：进程池中的 MiniMaxAI 不能再开 workers>1 的子进程池
+def run_tournament(pairs, configs=PLAYER_CONFIGS, openings=None, workers=None, out_path=None, verbose=True,
+                   sprt=None, replay_out=None):
+    if sprt is not None and len(pairs) != 1:
+        raise ValueError("SPRT 只适用于单组对阵")
+    if openings is None:
+        openings = [[]]
+    if out_path is None:
+        folder = "results"
+        if not os.path.exists(folder):
+            os.makedirs(folder)
+        out_path = f"{folder}/tournament_{datetime.datetime.now().strftime('%Y%m%d-%H%M%S')}.jsonl"
+    tasks = schedule(pairs, configs, openings)
+    results = []
+    replays = ReplayWriter(replay_out) if replay_out else None
+    with multiprocessing.Pool(workers or os.cpu_count()) as pool, open(out_path, "w", encoding="utf-8") as f:
+        for r in pool.imap_unordered(play_game, tasks):
+            results.append(r)
+            f.write(json.dumps(r) + "\n")
+            f.flush()
+            if replays is not None:
+                replays.write(r["moves"], {k: r[k] for k in ("black", "white", "opening", "opening_plies",
+                                                             "result", "black_discs", "white_discs")})
+            if verbose:
+                print(f"[{len(results)}/{len(tasks)}] {r['black']}(黑) {r['black_discs']}:{r['white_discs']} {r['white']}(白)")
+            if sprt is not None:
+                decision = sprt.status(*head_to_head(results, pairs[0][0]))
+                if decision is not None:
+                    if verbose:
+                        print(f"SPRT 结论 {decision}（{len(results)} 盘后停止）")
+                    break
+    if replays is not None:
+        replays.close()
+    if verbose:
+        print(f"结果已保存到 {out_path}")
+    return results
+
+def print_summary(results):
+    for name, s in sorted(summarize(results).items()):
+        print(f"{name:>12}: 胜{s['wins']} 负{s['losses']} 平{s['draws']}  "
+              f"平均子差{s['disc_margin']:+.2f}  每步{s['time_per_move']:.3f}s")
+        print(f"{'':>12}  {report(*head_to_head(results, name))}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="AI 对战赛（多进程）")
+    parser.add_argument("players", nargs="+", choices=sorted(PLAYER_CONFIGS))
+    parser.add_argument("--gauntlet", action="store_true", help="第一个参赛者对其余每个（默认循环赛）")
+    parser.add_argument("--openings", type=int, default=4, help="随机开局数，每个开局双方各执黑一次")
+    parser.add_argument("--plies", type=int, default=6)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--out", default=None)
+    parser.add_argument("--replays", default=None, help="把所有棋谱追加到该二进制棋谱文件")
+    parser.add_argument("--sprt", nargs=2, type=float, metavar=("ELO0", "ELO1"),
+                        help="两名参赛者时做序贯检验，有结论即提前结束")
+    args = parser.parse_args()
+    pairs = gauntlet(args.players[0], args.players[1:]) if args.gauntlet else round_robin(args.players)
+    sprt = SPRT(*args.sprt) if args.sprt else None
+    results = run_tournament(pairs, openings=random_openings(args.openings, args.plies, args.seed),
+                             workers=args.workers, out_path=args.out, sprt=sprt,
+                             replay_out=args.replays)
+    print_summary(results)
@@ -0,0 +1,46 @@
+EXACT, LOWER, UPPER = 0, 1, 2
+
+# 每个表项（元组+整数对象）在 CPython 中的大致内存占用，用于按 MB 换算容量
+ENTRY_BYTES = 160
+
+
+class TranspositionTable:
+    # 每个桶两个槽：槽0深度优先（旧搜索留下的或更浅的才被替换），槽1总是替换
+    def __init__(self, max_mb=16):
+        n_buckets = max(1, int(max_mb * 1024 * 1024) // (ENTRY_BYTES * 2))
+        self.mask = (1 << (n_buckets.bit_length() - 1)) - 1
+        self.slots = [None] * ((self.mask + 1) * 2)
+        self.generation = 0
+        self.probes = 0
+        self.hits = 0
+        self.stores = 0
+
+    def new_search(self):
+        self.generation += 1
+
+    def clear(self):
+        self.slots = [None] * len(self.slots)
+        self.generation = 0
+
+    # 返回 (depth, bound, value, best_move) 或 None
+    def probe(self, key):
+        self.probes += 1
+        i = (key & self.mask) << 1
+        for entry in (self.slots[i], self.slots[i + 1]):
+            if entry is not None and entry[0] == key:
+                self.hits += 1
+                return entry[1:5]
+        return None
+
+    def store(self, key, depth, bound, value, best_move):
+        self.stores += 1
+        i = (key & self.mask) << 1
+        entry = (key, depth, bound, value, best_move, self.generation)
+        old = self.slots[i]
+        if old is None or old[0] == key or old[5] != self.generation or depth >= old[1]:
+            self.slots[i] = entry
+        else:
+            self.slots[i + 1] = entry
+
+    def usage(self):
+        return sum(1 for e in self.slots if e is not None) / len(self.slots)
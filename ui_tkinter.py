@@ -1,12 +1,17 @@
 import tkinter as tk
 from tkinter import messagebox, filedialog
-import os, json, datetime, threading, time
-from board import Board, BLACK, WHITE
+import os, datetime, multiprocessing
+from board import BLACK, WHITE
+from bitboard import iter_squares
 from player import HumanPlayer
 from ai_greedy import GreedyAI
 from ai_minimax import MiniMaxAI
 from evaluate import full_eval, base_eval
-import numpy as np
+from pattern import pattern_eval, WEIGHTS_PATH
+from book import BOOK_PATH
+from replay import read_games, save_game, ReplayCursor, REPLAY_EXT
+from game import Game
+from search_worker import SearchWorker
 from PIL import Image, ImageTk
 
 CELL_SIZE = 52
@@ -22,12 +27,20 @@ TIP_COLOR = "#7c5cff"
 HIGHLIGHT_COLOR = "#4ea4ff"
 COLOR_MAP = {BLACK: "#24252c", WHITE: "#f6f7f7"}
 UNDO_LIMIT = 5
+POLL_MS = 30  # AI 思考时查看搜索进程结果的间隔
 
 AI_LEVELS = [
     ("简单（贪心）", "Greedy", {"ai_class": GreedyAI}),
     ("标准（极小极大3层）", "MiniMax-3", {"ai_class": MiniMaxAI, "depth": 3, "eval_fn": base_eval}),
-    ("困难（极小极大5层+复杂评估）", "MiniMax-5+", {"ai_class": MiniMaxAI, "depth": 5, "eval_fn": full_eval}),
+    ("困难（极小极大6层+复杂评估）", "MiniMax-6+", {"ai_class": MiniMaxAI, "depth": 6, "eval_fn": full_eval,
+                                               "book": BOOK_PATH}),
+    ("限时（每步2秒迭代加深）", "MiniMax-2s", {"ai_class": MiniMaxAI, "depth": 60, "time_limit": 2.0, "eval_fn": full_eval,
+                                          "book": BOOK_PATH}),
 ]
+# 模式评估要用拟合好的权重（patterns/weights.npy）；没有该文件时默认表只相当于位置评估，比“困难”还弱，不提供这一难度
+if os.path.exists(WEIGHTS_PATH):
+    AI_LEVELS.insert(3, ("专家（极小极大6层+模式评估）", "Pattern-6", {"ai_class": MiniMaxAI, "depth": 6,
+                                                     "eval_fn": pattern_eval, "book": BOOK_PATH}))
 
 def get_board_score(board):
     b, w = int((board==BLACK).sum()), int((board==WHITE).sum())
@@ -120,7 +133,7 @@ class MainMenuFrame(tk.Frame):
     def pick_human_vs_ai(self, callback):
         dlg = tk.Toplevel(self)
         dlg.title("人机对战配置")
-        dlg.geometry("520x520")
+        dlg.geometry(f"520x{360 + 40 * len(AI_LEVELS)}")
         dlg.resizable(True, True)
         dlg.configure(bg="#f7faf6")
         outer = tk.Frame(dlg, bg="#f7faf6")
@@ -171,15 +184,15 @@ class MainMenuFrame(tk.Frame):
         folder = "replays"
         if not os.path.exists(folder):
             os.makedirs(folder)
-        fname = filedialog.askopenfilename(title="选择棋谱文件(.json)", initialdir=folder,
-                                           filetypes=[("棋局棋谱", "*.json")])
+        fname = filedialog.askopenfilename(title="选择棋谱文件", initialdir=folder,
+                                           filetypes=[("棋局棋谱", f"*{REPLAY_EXT} *.json")])
         if fname:
             start_callback(("replay_mode", fname))
 
     def pick_ai_vs_ai(self, callback):
         dlg = tk.Toplevel(self)
         dlg.title("双AI对战配置")
-        dlg.geometry("520x480")
+        dlg.geometry(f"520x{240 + 80 * len(AI_LEVELS)}")
         dlg.resizable(True, True)
         dlg.configure(bg="#f7faf6")
         # 黑方AI难度
@@ -215,15 +228,15 @@ class GameFrame(tk.Frame):
 
         if isinstance(modeconf, tuple) and modeconf[0] == "replay_mode":
             _, fname = modeconf
-            with open(fname, "r", encoding="utf-8") as f:
-                self.replay_summary = json.load(f)
+            # 文件中有多盘时复盘第一盘；只保留着法，局面由 ReplayCursor 按需重建
+            self.replay = ReplayCursor(next(read_games(fname)))
             self.replay_idx = 0
             self.game_info = "棋局复盘模式"
             self.is_replay_mode = True
             class DummyHumanPlayer: pass
             self.player1 = self.player2 = DummyHumanPlayer()
             self.player_order = [self.player1, self.player2]
-            self.board = Board()
+            self.board = self.replay.board
             self.apply_replay_idx()
         else:
             self.is_replay_mode = False
@@ -269,13 +282,19 @@ class GameFrame(tk.Frame):
                 self.game_info = f"黑：{self.ai1_name}  白：{self.ai2_name}"
             else:
                 raise ValueError("modeconf wrong")
-            self.board = Board()
-            self.history = []
-            self.recorded_moves = []
             self.paused = False
-            self.turn = 0
-            self.current_player = self.player_order[0]
-            self.save_full_history_snapshot("init", None)
+            self.new_game()
+        # AI 在单独的进程里搜索，界面线程只提交局面、轮询结果
+        self.worker = None
+        self.search_id = None
+        self.search_state = None
+        self.ponder_state = None
+        self.polling = False
+        ai_players = [p for p in self.player_order if not isinstance(p, HumanPlayer) and hasattr(p, "get_move")]
+        if ai_players and not getattr(self, "is_replay_mode", False):
+            self.worker = SearchWorker()
+            for p in ai_players:
+                self.worker.set_player(p.color, p)
 
         self.score_label = tk.Label(self, text="", font=("微软雅黑", 13, "bold"),
                                     bg="#dde4f1", fg="#444968", pady=8, borderwidth=0)
@@ -322,6 +341,7 @@ class GameFrame(tk.Frame):
         else:
             self.bg_img_id = None
         self.canvas.bind("<Button-1>", self.on_click)
+        self.build_board_items()
 
         if getattr(self, "is_replay_mode", False):
             self.replay_btns = tk.Frame(self, bg="#f3f4f2")
@@ -335,26 +355,33 @@ class GameFrame(tk.Frame):
             self.btn_prev.pack(side="left", padx=11)
             self.btn_next.pack(side="left", padx=11)
             self.btn_exit.pack(side="left", padx=11)
+            # 拖动滑块可连续跳转到任意一步
+            self.replay_scale = tk.Scale(self, from_=0, to=len(self.replay), orient=tk.HORIZONTAL, showvalue=False,
+                                         length=n * CELL_SIZE, bg="#f3f4f2", highlightthickness=0,
+                                         command=lambda v: self.replay_jump(int(v)))
+            self.replay_scale.pack()
+            self.bind_all("<Left>", lambda e: self.replay_prev())
+            self.bind_all("<Right>", lambda e: self.replay_next())
+            self.bind_all("<Home>", lambda e: self.replay_jump(0))
+            self.bind_all("<End>", lambda e: self.replay_jump(len(self.replay)))
             self.btn_pause.config(state="disabled")
             self.btn_undo.config(state="disabled")
             self.btn_restart.config(state="disabled")
             self.btn_tip.config(state="disabled")
         self.update_ui()
         if not getattr(self, "is_replay_mode", False):
-            self.play_game_threaded()
+            self.play_game_async()
 
     def get_info_text(self):
         return self.game_info
 
     def apply_replay_idx(self):
-        snap = self.replay_summary[self.replay_idx]
-        board_arr = np.array(snap['board'])
-        self.board.board = board_arr
-        self.board.size = board_arr.shape[0]
+        self.replay.seek(self.replay_idx)
 
-    def update_ui(self):
-        self.canvas.delete("all")
-        n = self.board.size
+    # 画布上的图元只在这里创建一次：底板、网格，以及每格的阴影、棋子、高光、可落子提示，
+    # 之后 update_ui 只改动有变化的格子（itemconfig/coords），不再整盘删除重画
+    def build_board_items(self):
+        n = 8
         pad = 28
         # 棋盘阴影、边框
         self.round_rectangle(pad-8,pad-8,pad+n*CELL_SIZE+8,pad+n*CELL_SIZE+8, radius=22,
@@ -370,54 +397,59 @@ class GameFrame(tk.Frame):
             self.canvas.create_line(
                 pad + i * CELL_SIZE, pad, pad + i * CELL_SIZE, pad + n * CELL_SIZE,
                 fill=BOARD_LINE, width=2)
-        if getattr(self, "is_replay_mode", False):
-            self.apply_replay_idx()
-        for i in range(n):
-            for j in range(n):
-                piece = self.board.board[i][j]
-                if piece != 0:
-                    # 阴影
-                    cx = pad + j * CELL_SIZE + CELL_SIZE // 2
-                    cy = pad + i * CELL_SIZE + CELL_SIZE // 2
-                    self.canvas.create_oval(
-                        cx - 19, cy - 19+2, cx + 19, cy + 19+2,
-                        fill="#b7bebc" if piece==BLACK else "#f2f5f8", outline="", width=0
-                    )
-        for i in range(n):
-            for j in range(n):
-                piece = self.board.board[i][j]
-                if piece != 0:
-                    self.draw_piece(i, j, piece, pad)
+        centers = [(pad + j * CELL_SIZE + CELL_SIZE // 2, pad + i * CELL_SIZE + CELL_SIZE // 2)
+                   for i in range(n) for j in range(n)]
+        # 阴影全部在棋子下层，先建
+        self.shadow_items = [self.canvas.create_oval(cx - 19, cy - 19+2, cx + 19, cy + 19+2,
+                                                     outline="", width=0, state="hidden")
+                             for cx, cy in centers]
+        self.piece_items = []
+        self.gloss_items = []
+        r1 = 20
+        for cx, cy in centers:
+            self.piece_items.append(self.canvas.create_oval(cx - r1, cy - r1, cx + r1, cy + r1,
+                                                            outline="#3c4170", width=2, state="hidden"))
+            self.gloss_items.append(self.canvas.create_oval(0, 0, 0, 0, outline="", state="hidden"))
         # 可落子点、AI提示推荐
-        moves = []
+        r = 13
+        self.hint_items = [self.canvas.create_oval(cx - r, cy - r, cx + r, cy + r, outline=HIGHLIGHT_COLOR,
+                                                   width=3, fill="", dash=(4, 3), state="hidden")
+                           for cx, cy in centers]
+        self.tip_item = self.canvas.create_oval(0, 0, 0, 0, outline=TIP_COLOR, width=4, fill="", dash=(5,1),
+                                                state="hidden")
+        self.drawn_bits = (0, 0)  # 画布上当前显示的黑、白位棋盘
+        self.drawn_hints = 0
+        self.drawn_tip = None
+
+    def update_ui(self):
+        pad = 28
+        black, white = self.board.black_bits, self.board.white_bits
+        drawn_black, drawn_white = self.drawn_bits
+        for sq in iter_squares((black ^ drawn_black) | (white ^ drawn_white)):
+            piece = BLACK if black >> sq & 1 else WHITE if white >> sq & 1 else 0
+            self.draw_piece(*divmod(sq, 8), piece, pad)
+        self.drawn_bits = (black, white)
+        hints = 0
         if not getattr(self, "is_replay_mode", False):
-            cur_color = self.current_player.color
-            moves = self.board.get_legal_moves(cur_color)
-        for move in moves:
-            i, j = move
-            cx = pad + j * CELL_SIZE + CELL_SIZE // 2
-            cy = pad + i * CELL_SIZE + CELL_SIZE // 2
-            r = 13
-            self.canvas.create_oval(
-                cx - r, cy - r, cx + r, cy + r,
-                outline=HIGHLIGHT_COLOR, width=3, fill="",
-                dash=(4, 3))
-        # AI高亮
-        if self.tip_suggest and not getattr(self, "is_replay_mode", False):
-            i, j = self.tip_suggest
-            cx = pad + j * CELL_SIZE + CELL_SIZE // 2
-            cy = pad + i * CELL_SIZE + CELL_SIZE // 2
-            r = 19
-            self.canvas.create_oval(
-                cx - r, cy - r, cx + r, cy + r,
-                outline=TIP_COLOR, width=4, fill="", dash=(5,1)
-            )
-        b, w = (self.board.count() if not getattr(self, "is_replay_mode", False)
-                else (int((self.board.board==BLACK).sum()), int((self.board.board==WHITE).sum())))
+            hints = self.board.legal_mask(self.current_player.color)
+        for sq in iter_squares(hints ^ self.drawn_hints):
+            self.canvas.itemconfig(self.hint_items[sq], state="normal" if hints >> sq & 1 else "hidden")
+        self.drawn_hints = hints
+        tip = None if getattr(self, "is_replay_mode", False) else self.tip_suggest
+        if tip != self.drawn_tip:
+            if tip:
+                i, j = tip
+                cx = pad + j * CELL_SIZE + CELL_SIZE // 2
+                cy = pad + i * CELL_SIZE + CELL_SIZE // 2
+                r = 19
+                self.canvas.coords(self.tip_item, cx - r, cy - r, cx + r, cy + r)
+            self.canvas.itemconfig(self.tip_item, state="normal" if tip else "hidden")
+            self.drawn_tip = tip
+        b, w = self.board.count()
         text = self.get_info_text() + "   "
         text += f"●黑: {b}    ○白: {w}   "
         scoretip = get_board_score(self.board.board)
-        self.score_label.config(text="当前局势：" + scoretip)
+        self.score_label.config(text="当前局势：" + scoretip + getattr(self, "ai_stats_text", ""))
         if not getattr(self, "is_replay_mode", False):
             if self.board.is_game_over():
                 if b > w:
@@ -436,51 +468,54 @@ class GameFrame(tk.Frame):
                 cur_color = self.current_player.color
                 text += f"当前回合：{'黑●' if cur_color==BLACK else '白○'}"
         else:
-            snap = self.replay_summary[self.replay_idx]
             movei = self.replay_idx
             stepinfo = ""
             if movei==0:
                 stepinfo = "（开局）"
             else:
-                color = snap["color"]
-                move = snap["move"]
+                color, move = self.replay.move_before(movei)
                 if move:
                     cstr = "黑" if color==BLACK else "白"
                     stepinfo = f"  {cstr}落子: ({move[0]+1},{move[1]+1})"
                 else:
                     cstr = "黑" if color==BLACK else "白"
                     stepinfo = f"  {cstr}跳过"
-            text += f"    步数：{movei+1}/{len(self.replay_summary)}{stepinfo}"
+            text += f"    步数：{movei+1}/{len(self.replay)+1}{stepinfo}"
             self.score_label.config(text="当前局势：" + get_board_score(self.board.board))
         self.status_label.config(text=text)
         if hasattr(self, "btn_undo"):
             if getattr(self, "is_replay_mode", False):
                 self.btn_undo.config(state="disabled")
             else:
-                if len(getattr(self, "history", [])) == 0:
+                if self.undo_left == 0 or not self.game.moves:
                     self.btn_undo.config(state="disabled")
                 else:
                     self.btn_undo.config(state="normal")
 
+    # 改画一格：color 为 0 时隐藏该格的阴影、棋子与高光
     def draw_piece(self, i, j, color, pad):
+        sq = i * 8 + j
+        shadow, piece, gloss = self.shadow_items[sq], self.piece_items[sq], self.gloss_items[sq]
+        if not color:
+            for item in (shadow, piece, gloss):
+                self.canvas.itemconfig(item, state="hidden")
+            return
         cx = pad + j * CELL_SIZE + CELL_SIZE // 2
         cy = pad + i * CELL_SIZE + CELL_SIZE // 2
-        r1, r2 = 20, 13
-        self.canvas.create_oval(
-            cx - r1, cy - r1, cx + r1, cy + r1,
-            fill=COLOR_MAP[color], outline="#3c4170", width=2
-        )
+        r2 = 13
+        self.canvas.itemconfig(shadow, fill="#b7bebc" if color==BLACK else "#f2f5f8", state="normal")
+        self.canvas.itemconfig(piece, fill=COLOR_MAP[color], state="normal")
         if color == BLACK:
-            self.canvas.create_oval(cx - r2, cy - r2-2, cx + r2-9, cy + r2-8,
-                                   fill="#babdc5", outline="", stipple="gray50")
+            self.canvas.coords(gloss, cx - r2, cy - r2-2, cx + r2-9, cy + r2-8)
+            self.canvas.itemconfig(gloss, fill="#babdc5", stipple="gray50", state="normal")
         else:
-            self.canvas.create_oval(cx - r2+3, cy - r2-2, cx + r2+3, cy + r2,
-                                   fill="#ffffff", outline="", stipple="gray12")
+            self.canvas.coords(gloss, cx - r2+3, cy - r2-2, cx + r2+3, cy + r2)
+            self.canvas.itemconfig(gloss, fill="#ffffff", stipple="gray12", state="normal")
 
     def on_click(self, event):
         if getattr(self, "is_replay_mode", False):
             return
-        if self.paused or self.board.is_game_over():
+        if self.paused or self.board.is_game_over() or not isinstance(self.current_player, HumanPlayer):
             return
         self.tip_suggest = None
         pad = 28
@@ -490,80 +525,122 @@ class GameFrame(tk.Frame):
             i = int(x // CELL_SIZE)
             j = int(y // CELL_SIZE)
             move = (i,j)
-            legal_moves = self.board.get_legal_moves(self.current_player.color)
-            if move in legal_moves:
-                self.save_history()
-                self.save_full_history_snapshot(self.current_player.color, move)
-                self.board.do_move(move, self.current_player.color)
-                self.turn += 1
-                self.swap_player()
+            if self.board.is_legal(move, self.game.color):
+                self.play_move(move)
                 self.update_ui()
-                self.after(120, self.play_game_threaded)
+                self.after(120, self.play_game_async)
 
-    def play_game_threaded(self):
+    # 轮到 AI 时把局面交给搜索进程，结果由 poll_search 取回；界面线程从不等待搜索
+    def play_game_async(self):
         if getattr(self, "is_replay_mode", False):
             return
         if self.paused or self.board.is_game_over():
             self.update_ui()
             return
-        if hasattr(self.current_player, 'get_move') and not isinstance(self.current_player, HumanPlayer):
-            t = threading.Thread(target=self.ai_move_and_update)
-            t.daemon = True
-            t.start()
-
-    def ai_move_and_update(self):
-        time.sleep(0.12)
-        legal_moves = self.board.get_legal_moves(self.current_player.color)
-        if not legal_moves:
-            self.save_full_history_snapshot(self.current_player.color, None)
-            self.turn += 1
-            self.swap_player
-            self.after(80, self.update_ui)
-            self.after(210, self.play_game_threaded)
+        if self.worker is None or self.search_id is not None:
             return
-        self.save_history()
-        move = self.current_player.get_move(self.board)
-        if move:
-            self.save_full_history_snapshot(self.current_player.color, move)
-            self.board.do_move(move, self.current_player.color)
-        self.turn += 1
-        self.swap_player()
-        self.after(45, self.update_ui)
-        self.after(110, self.play_game_threaded)
-
-    def save_history(self):
-        if not hasattr(self, "history"):
-            self.history = []
-        self.history.append((
-            self.board.board.copy(),
-            self.turn,
-            self.current_player
-        ))
-        if len(self.history) > UNDO_LIMIT:
-            self.history = self.history[-UNDO_LIMIT:]
-
-    def save_full_history_snapshot(self, color, move):
-        if not hasattr(self, "recorded_moves"):
-            self.recorded_moves = []
-        item = {
-            "board": self.board.board.tolist(),
-            "color": int(color) if color in [BLACK, WHITE] else None,
-            "move": list(move) if move is not None else None
-        }
-        self.recorded_moves.append(item)
+        if isinstance(self.current_player, HumanPlayer):
+            self.start_ponder()
+            return
+        self.ponder_state = None
+        self.search_id = self.worker.search(self.game.color, self.board)
+        self.search_state = self.position_state()
+        if not self.polling:
+            self.polling = True
+            self.after(POLL_MS, self.poll_search)
+
+    # 人机对战轮到人时，AI 在搜索进程里预想人的每种应着；人落子后的搜索命中即立刻出着
+    def start_ponder(self):
+        opponent = self.game.players[-self.game.color]
+        if isinstance(opponent, HumanPlayer) or self.ponder_state == self.position_state():
+            return
+        self.ponder_state = self.position_state()
+        self.worker.ponder(opponent.color, self.board)
+
+    # 用来确认搜索结果回来时对局没有被悔棋、重开等改动过
+    def position_state(self):
+        return self.board.black_bits, self.board.white_bits, self.game.color, len(self.game.moves)
+
+    def poll_search(self):
+        if self.worker is None:
+            self.polling = False
+            return
+        for msg in self.worker.poll():
+            kind, request_id = msg[0], msg[1]
+            if request_id != self.search_id:
+                continue  # 已取消的请求
+            if kind == "progress":
+                self.show_ai_stats(msg[2], thinking=True)
+                self.update_ui()
+            elif kind == "done":
+                self.search_id = None
+                move, stats = msg[2], msg[3]
+                if self.position_state() == self.search_state:
+                    if stats is not None:
+                        self.show_ai_stats(stats)
+                    self.play_move(move)
+                    self.update_ui()
+                    self.after(110, self.play_game_async)
+            else:
+                self.search_id = None
+                if kind == "error":
+                    messagebox.showerror("AI出错", msg[2])
+        if self.search_id is not None:
+            self.after(POLL_MS, self.poll_search)
+        else:
+            self.polling = False
+
+    def show_ai_stats(self, stats, thinking=False):
+        if stats["book"]:
+            self.ai_stats_text = "   AI: 开局库"
+        elif stats.get("pondered"):
+            self.ai_stats_text = (f"   AI: 已在你思考时算好（{stats['nodes']}节点 深度{stats['depth']}"
+                                  f"{'(终局)' if stats['solver'] else ''}）")
+        elif thinking:
+            self.ai_stats_text = (f"   AI思考中: 深度{stats['depth']} {stats['nodes']}节点 "
+                                  f"{stats['nps']:,.0f}/s {stats['time']:.1f}s")
+        else:
+            self.ai_stats_text = (f"   AI: {stats['nodes']}节点 {stats['nps']:,.0f}/s "
+                                  f"深度{stats['depth']}{'(终局)' if stats['solver'] else ''} {stats['time']:.2f}s")
+
+    # 中止正在进行的搜索与预想，迟到的结果会被丢弃
+    def cancel_search(self):
+        if self.worker is not None:
+            self.worker.cancel()
+        self.search_id = None
+        self.ponder_state = None
+
+    # 对局状态（轮次、跳过、着法记录、悔棋）都由 game.Game 管理
+    def new_game(self):
+        players = {p.color: p for p in self.player_order}
+        self.game = Game(players[BLACK], players[WHITE], first=self.player_order[0].color)
+        self.board = self.game.board
+        self.undo_left = 0
+
+    @property
+    def current_player(self):
+        return self.game.current_player
+
+    def play_move(self, move):
+        self.game.play(move)
+        self.undo_left = min(UNDO_LIMIT, self.undo_left + 1)
 
     def undo(self):
         if getattr(self, "is_replay_mode", False):
             return
         self.tip_suggest = None
-        if not hasattr(self, "history") or not self.history:
+        if self.undo_left == 0 or not self.game.moves:
             messagebox.showinfo("提示", f"已达到悔棋步数上限（最近最多{UNDO_LIMIT}步）！")
             return
-        last_board, self.turn, self.current_player = self.history.pop()
-        self.board.board = last_board.copy()
-        if hasattr(self, "recorded_moves") and len(self.recorded_moves) > 1:
-            self.recorded_moves.pop()
+        self.cancel_search()
+        self.game.undo()
+        self.undo_left -= 1
+        # 人机对战时连同 AI 的那步一起撤销，回到人的回合
+        has_human = any(isinstance(p, HumanPlayer) for p in self.player_order)
+        while has_human and not isinstance(self.current_player, HumanPlayer) and self.game.undo() is not None:
+            self.undo_left = max(0, self.undo_left - 1)
         self.update_ui()
+        self.play_game_async()
 
     def restart(self):
         if getattr(self, "is_replay_mode", False):
@@ -571,34 +648,39 @@ class GameFrame(tk.Frame):
         ret = messagebox.askyesno("确认", "确定要重新开始吗？")
         if not ret: return
         self.tip_suggest = None
-        self.board = Board()
-        self.history = []
-        self.recorded_moves = []
-        self.turn = 0
-        self.current_player = self.player_order[0]
-        self.save_full_history_snapshot("init", None)
+        self.cancel_search()
+        for p in self.player_order:
+            if hasattr(p, "new_game"):
+                p.new_game()
+            if self.worker is not None and not isinstance(p, HumanPlayer):
+                self.worker.new_game(p.color)
+        self.new_game()
         self.update_ui()
-        self.play_game_threaded()
+        self.play_game_async()
 
     def toggle_pause(self):
         if getattr(self, "is_replay_mode", False):
             return
         self.paused = not self.paused
+        if self.paused:
+            self.cancel_search()
         self.update_ui()
         if not self.paused:
-            self.play_game_threaded()
+            self.play_game_async()
 
     def to_menu(self):
         ret = messagebox.askyesno("提示", "返回菜单将丢失当前棋局。确定返回菜单？")
         if not ret: return
+        if getattr(self, "is_replay_mode", False):
+            for key in ("<Left>", "<Right>", "<Home>", "<End>"):
+                self.unbind_all(key)
+        if self.worker is not None:
+            self.cancel_search()
+            self.worker.close()
+            self.worker = None
         self.pack_forget()
         self.return_menu_callback()
 
-    def swap_player(self):
-        opp = self.player_order[1] if self.current_player == self.player_order[0] else self.player_order[0]
-        if self.board.get_legal_moves(opp.color):
-            self.current_player = opp
-
     def round_rectangle(self, x1, y1, x2, y2, radius=15, **kwargs):
         points = [x1+radius, y1, x2-radius, y1, x2, y1, x2, y1+radius,
             x2, y2-radius, x2, y2, x2-radius, y2, x1+radius, y2,
@@ -606,32 +688,26 @@ class GameFrame(tk.Frame):
         return self.canvas.create_polygon(points, smooth=True, **kwargs)
 
     def replay_prev(self):
-        if self.replay_idx > 0:
-            self.replay_idx -= 1
-            self.apply_replay_idx()
-            self.update_ui()
+        self.replay_jump(self.replay_idx - 1)
     def replay_next(self):
-        if self.replay_idx < len(self.replay_summary)-1:
-            self.replay_idx += 1
-            self.apply_replay_idx()
-            self.update_ui()
+        self.replay_jump(self.replay_idx + 1)
+
+    def replay_jump(self, idx):
+        idx = max(0, min(idx, len(self.replay)))
+        if idx == self.replay_idx:
+            return
+        self.replay_idx = idx
+        self.apply_replay_idx()
+        self.replay_scale.set(idx)
+        self.update_ui()
 
     def save_game_history_full(self):
-        folder = "replays"
-        if not os.path.exists(folder):
-            os.makedirs(folder)
-        filetime = datetime.datetime.now().strftime("%Y%m%d-%H%M%S")
-        fname = f"{folder}/replay_{filetime}.json"
-        fullmoves = list(self.recorded_moves)
-        if not (fullmoves and np.array_equal(self.board.board, np.array(fullmoves[-1]["board"]))):
-            fullmoves.append({
-                "board": self.board.board.tolist(),
-                "color": None,
-                "move": None,
-            })
-        with open(fname, "w", encoding="utf-8") as f:
-            json.dump(fullmoves, f)
-        return fname
+        b, w = self.board.count()
+        header = {"mode": self.game_info, "date": datetime.datetime.now().isoformat(timespec="seconds"),
+                  "black_discs": b, "white_discs": w, "result": (b > w) - (w > b)}
+        # 棋谱约定黑先，白先手的对局在开头记一次黑方跳过
+        moves = ([None] if self.game.first == WHITE else []) + self.game.moves
+        return save_game(moves, header)
 
     # ---- AI提示功能 ----
     def ai_tip_move(self):
@@ -642,7 +718,8 @@ class GameFrame(tk.Frame):
         if not legal_moves:
             messagebox.showinfo("AI提示", "当前无可下棋点！")
             return
-        tip_ai = MiniMaxAI(color, depth=3, eval_fn=base_eval)
+        # 提示在界面线程里直接搜索：只做 3 层常规搜索，不进终局求解（12 空精确求解要 1~2.5 s）
+        tip_ai = MiniMaxAI(color, depth=3, eval_fn=base_eval, endgame_empties=0)
         move = tip_ai.get_move(self.board)
         if move:
             self.tip_suggest = move
@@ -702,4 +779,5 @@ class OthelloApp(tk.Tk):
         self.game_frame.pack(fill=tk.BOTH, expand=True)
 
 if __name__ == "__main__":
+    multiprocessing.freeze_support()
     OthelloApp().mainloop()
\ No newline at end of file
@@ -1,4 +1,2 @@
-import copy
-
 def deep_copy_board(board):
-    return copy.deepcopy(board)
\ No newline at end of file
+    return board.copy()
\ No newline at end of file
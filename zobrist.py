@@ -0,0 +1,19 @@
+import random
+from bitboard import iter_squares
+
+_rng = random.Random(20251228)
+
+ZOBRIST_BLACK = [_rng.getrandbits(64) for _ in range(64)]
+ZOBRIST_WHITE = [_rng.getrandbits(64) for _ in range(64)]
+# 翻转一枚棋子 = 同时异或该格黑、白两个键
+ZOBRIST_FLIP = [b ^ w for b, w in zip(ZOBRIST_BLACK, ZOBRIST_WHITE)]
+ZOBRIST_SIDE = _rng.getrandbits(64)  # 白方行棋时异或
+
+
+def hash_bits(black_bits, white_bits):
+    h = 0
+    for sq in iter_squares(black_bits):
+        h ^= ZOBRIST_BLACK[sq]
+    for sq in iter_squares(white_bits):
+        h ^= ZOBRIST_WHITE[sq]
+    return h